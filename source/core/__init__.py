@@ -1,6 +1,9 @@
 from .client import Asteroid  # noqa
 from .context import *  # noqa
 from .database import *  # noqa
+from .debounce import *  # noqa
 from .decorators import *  # noqa
 from .enums import *  # noqa
 from .error import *  # noqa
+from .paginator import *  # noqa
+from .scheduler import *  # noqa
@@ -1,5 +1,6 @@
-from collections import defaultdict
-from typing import Generic, Type, TypeAlias, TypeVar
+from collections import OrderedDict, defaultdict
+from time import monotonic
+from typing import Generic, Hashable, Type, TypeAlias, TypeVar
 
 ID: TypeAlias = str
 _T = TypeVar("_T")
@@ -27,6 +28,47 @@ class Storage(Generic[_T]):
         return self.values.items()
 
 
+class LRUStorage(Storage[_T]):
+    """
+    Storage which keeps only `maxsize` recently used items.
+    Items expire after `ttl` seconds if it's passed.
+    """
+
+    __slots__ = ("maxsize", "ttl", "_expires_at")
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        super().__init__()
+        self.values: OrderedDict[Hashable, _T] = OrderedDict()
+        self.maxsize: int = maxsize
+        self.ttl: float | None = ttl
+        self._expires_at: dict[Hashable, float] = {}
+
+    def __setitem__(self, key: Hashable, value: _T):
+        self.set(key, value)
+
+    def __getitem__(self, key: Hashable) -> _T:
+        if (expires_at := self._expires_at.get(key)) is not None and expires_at <= monotonic():
+            self.pop(key)
+            return None
+        if (value := self.values.get(key)) is not None:
+            self.values.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: _T, *, ttl: float = None):
+        """Sets the item. `ttl` overrides the default time to live of the storage"""
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if (ttl := ttl or self.ttl) is not None:
+            self._expires_at[key] = monotonic() + ttl
+        if len(self.values) > self.maxsize:
+            old_key, _ = self.values.popitem(last=False)
+            self._expires_at.pop(old_key, None)
+
+    def pop(self, key: Hashable) -> _T | None:
+        self._expires_at.pop(key, None)
+        return self.values.pop(key, None)
+
+
 class Cache:
     __slots__ = "storages"
 
@@ -1,11 +1,34 @@
-from interactions import Channel, Client, Guild, Member, Message, Role, Snowflake, User
+import asyncio
+import logging
+import signal
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+from interactions import (
+    Channel,
+    Client,
+    Extension,
+    Guild,
+    Intents,
+    Member,
+    Message,
+    Role,
+    Snowflake,
+    User,
+)
 from interactions.ext.i18n import Localization
 
 from .context import CommandContext, ComponentContext
 from .database import DataBaseClient
+from .intents import get_intents_report
+from .paginator import PaginatorManager
+from .router import ComponentRouter
+from .scheduler import RequestScheduler
 
 __all__ = ["Asteroid"]
 
+log = logging.getLogger(__name__)
+
 
 class Asteroid(Client):
     def __init__(self, mongodb_url: str, **kwargs):
@@ -14,6 +37,66 @@ class Asteroid(Client):
         )
         self.database = DataBaseClient(mongodb_url)
         self.i18n = Localization(self)
+        # Intents which are always requested regardless of loaded extensions
+        self.base_intents: Intents = kwargs.get("intents", Intents.GUILDS)
+        self.component_router = ComponentRouter()
+        self.event(self.component_router.dispatch, name="on_component")
+        self.scheduler = RequestScheduler()
+        self.paginators = PaginatorManager(self.component_router)
+        self._shutdown_callbacks: list[Callable[[], Awaitable]] = []
+        self._shutdown_task: asyncio.Task | None = None
+
+    def get_required_intents(self) -> Intents:
+        """Returns the minimal intents set required by loaded extensions"""
+        intents = self.base_intents
+        for extension in self._extensions.values():
+            if isinstance(extension, Extension):
+                intents |= getattr(extension, "intents", self.base_intents)
+        return intents
+
+    def start(self, token: str = None):
+        intents = self.get_required_intents()
+        self._intents = intents
+        if websocket := getattr(self, "_websocket", None):
+            # Websocket could be already created with intents passed to the client
+            websocket._intents = intents
+
+        decoded, dropped = get_intents_report(intents)
+        log.info(f"Requesting intents: {intents!r}")
+        log.info(f"Decoded gateway events ({len(decoded)}): {', '.join(decoded)}")
+        log.info(f"Dropped at gateway events ({len(dropped)}): {', '.join(dropped)}")
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Process killed by a signal doesn't run `finally` blocks, so the bot shuts down itself.
+            # Signal handlers aren't supported on Windows
+            with suppress(NotImplementedError):
+                self._loop.add_signal_handler(sig, self._on_stop_signal, sig)
+
+        super().start(token)
+
+    def _on_stop_signal(self, sig: signal.Signals):
+        if self._shutdown_task is not None:
+            return
+        log.info(f"Received {sig.name}, shutting down")
+        self._shutdown_task = self._loop.create_task(self.shutdown())
+
+    async def shutdown(self):
+        """Runs shutdown callbacks and stops the client"""
+        await self.run_shutdown_callbacks()
+        await self._stop()
+
+    def add_shutdown_callback(self, callback: Callable[[], Awaitable]):
+        """Adds a coroutine function which will be called before the bot shutdown"""
+        self._shutdown_callbacks.append(callback)
+
+    async def run_shutdown_callbacks(self):
+        """Calls shutdown callbacks. Callbacks are called once even if shutdown is requested again"""
+        callbacks, self._shutdown_callbacks = self._shutdown_callbacks, []
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception:
+                log.exception(f"Shutdown callback {callback!r} failed")
 
     # async def send_error(self, exception: Exception, *, guild_id: int | Snowflake = None, channel_id: int | Snowflake = None):
     #     if channel_id is not None:
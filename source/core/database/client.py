@@ -1,14 +1,30 @@
+import asyncio
+from datetime import datetime
+from hashlib import sha256
+from typing import AsyncIterator
+
+from bson import ObjectId
 from interactions import Snowflake
 from motor.motor_asyncio import AsyncIOMotorClient
 
-from ..cache import Storage, cache
+from ..cache import LRUStorage, Storage, cache
 from ..error import BotException
 from .consts import AsyncMongoClient, DocumentType, OperatorType
-from .models import GuildAutoRole, GuildData, GuildTag, GuildUser, GuildVoiceLobbies
+from .models import (
+    GuildAutoRole,
+    GuildData,
+    GuildTag,
+    GuildTagBody,
+    GuildUser,
+    GuildUserWarn,
+    GuildVoiceLobbies,
+)
 from .requests import Requests
 
 __all__ = ["DataBaseClient"]
 
+TAG_BODIES_CACHE_SIZE = 512
+
 
 class DataBaseClient:
     def __init__(self, url: str):
@@ -16,21 +32,25 @@ class DataBaseClient:
         self._req = Requests(self._client)
         self._cache = cache
         self.guilds_storage: Storage = self._cache[GuildData]
+        # (guild_id, tag name): body of the tag
+        self.tag_bodies: LRUStorage[GuildTagBody] = LRUStorage(TAG_BODIES_CACHE_SIZE)
+        # Guilds which warns were moved from documents of users
+        self._migrated_warns: set[int] = set()
+        self._warns_migrations: dict[int, asyncio.Task] = {}
 
     async def add_guild(self, guild_id: int | Snowflake) -> GuildData:
         settings_data = await self._req.guild.add_guild(
             int(guild_id) if isinstance(guild_id, Snowflake) else guild_id
         )
         full_data = {"settings": settings_data}
-        guild = GuildData(**full_data)
+        guild = GuildData(**full_data, _database=self, guild_id=int(guild_id))
         self.guilds_storage[str(guild_id)] = guild
         return guild
 
     async def get_guild(self, guild_id: int | Snowflake) -> GuildData:
         _guild_id = str(guild_id)
-        for _id, guild in self.guilds_storage.items():
-            if _id == _guild_id:
-                return guild
+        if (guild := self.guilds_storage[_guild_id]) is not None:
+            return guild
         guild_raw_data = await self._req.guild.get_guild_raw_data(int(guild_id))
         guild_data = GuildData(
             **guild_raw_data,
@@ -42,6 +62,7 @@ class DataBaseClient:
 
     async def remove_guild(self, guild_id: int | Snowflake):
         await self._req.guild.remove_guild(int(guild_id))
+        await self._req.warns.remove_guild_warns(int(guild_id))
         del self.guilds_storage[str(guild_id)]
 
     async def update_guild(
@@ -147,8 +168,45 @@ class DataBaseClient:
             guild_id=int(guild_id) if isinstance(guild_id, Snowflake) else guild_id,
         )
         self.guilds_storage[str(guild_id)].tags.append(tag)
+        self.tag_bodies[(int(guild_id), name)] = GuildTagBody(title=title, description=description)
         return tag
 
+    async def increment_tags_uses(self, guild_id: int | Snowflake, uses: dict[str, int]):
+        """Increments uses count of many tags with one update"""
+        await self._req.guild.increment_tags_uses(int(guild_id), uses)
+
+        guild_data = self.guilds_storage[str(guild_id)]
+        if guild_data is None:
+            return
+        for tag in guild_data.tags:
+            if (count := uses.get(tag.name)) is not None:
+                tag.uses_count += count
+                # Already saved, so the next `update()` shouldn't set it again
+                tag._json["uses_count"] = tag.uses_count
+
+    async def get_tag_body(self, guild_id: int | Snowflake, name: str) -> GuildTagBody | None:
+        key = (int(guild_id), name)
+        if (body := self.tag_bodies[key]) is not None:
+            return body
+
+        data = await self._req.guild.get_tag_body(int(guild_id), name)
+        if data is None:
+            return
+
+        body = self.tag_bodies[key] = GuildTagBody(**data)
+        return body
+
+    async def update_tag_body(
+        self, guild_id: int | Snowflake, name: str, *, title: str | None, description: str
+    ):
+        await self._req.guild.update_document(
+            int(guild_id),
+            {"_id": DocumentType.TAGS, "tags.name": name},
+            OperatorType.SET,
+            {"tags.$.title": title, "tags.$.description": description},
+        )
+        self.tag_bodies[(int(guild_id), name)] = GuildTagBody(title=title, description=description)
+
     async def remove_tag(
         self, guild_id: int | Snowflake, *, name: str = None, tag: GuildTag = None
     ):
@@ -169,9 +227,10 @@ class DataBaseClient:
             int(guild_id) if isinstance(guild_id, Snowflake) else guild_id,
             DocumentType.TAGS,
             OperatorType.PULL,
-            tag._json,
+            {"tags": {"name": tag.name}},
         )
         self.guilds_storage[str(guild_id)].tags.remove(tag)
+        self.tag_bodies.pop((int(guild_id), tag.name))
 
     async def add_user(self, guild_id: int | Snowflake, user_id: int) -> GuildUser:
         data = await self._req.guild.add_user(
@@ -227,6 +286,14 @@ class DataBaseClient:
             int(guild_id) if isinstance(guild_id, Snowflake) else guild_id, user_id, data
         )
 
+    async def increment_users(
+        self, guild_id: int | Snowflake, increments: dict[int, dict[str, int]]
+    ):
+        """Increments fields of many users with one bulk write"""
+        await self._req.guild.increment_users(
+            int(guild_id) if isinstance(guild_id, Snowflake) else guild_id, increments
+        )
+
     async def setup_voice_lobbies(
         self,
         guild_id: int | Snowflake,
@@ -234,13 +301,16 @@ class DataBaseClient:
         voice_channel_id: int | Snowflake,
         text_channel_id: int | Snowflake | None = None,
         private_lobbies: bool = False,
-    ):
+        pool_size: int = 0,
+    ) -> GuildVoiceLobbies:
         data = {
             "active_channels": [],
             "category_channel_id": int(category_channel_id),
             "voice_channel_id": int(voice_channel_id),
             "text_channel_id": int(text_channel_id) if text_channel_id is not None else None,
             "private_lobbies": private_lobbies,
+            "pool_size": pool_size,
+            "pooled_channels": [],
         }
         await self.update_guild(
             int(guild_id) if isinstance(guild_id, Snowflake) else guild_id,
@@ -248,6 +318,131 @@ class DataBaseClient:
             OperatorType.SET,
             data,
         )
-        self.guilds_storage[str(guild_id)].voice_lobbies = GuildVoiceLobbies(
-            **data, _database=self, guild_id=guild_id
+        voice_lobbies = GuildVoiceLobbies(**data, _database=self, guild_id=guild_id)
+        self.guilds_storage[str(guild_id)].voice_lobbies = voice_lobbies
+        return voice_lobbies
+
+    async def get_music_queues(self) -> list[dict]:
+        return await self._req.music.get_queues()
+
+    async def save_music_queue(self, guild_id: int | Snowflake, data: dict):
+        await self._req.music.save_queue(int(guild_id), data)
+
+    async def remove_music_queue(self, guild_id: int | Snowflake):
+        await self._req.music.remove_queue(int(guild_id))
+
+    async def create_indexes(self):
+        await self._req.warns.create_indexes()
+
+    async def _migrate_legacy_warns(self, guild_id: int):
+        """Moves warns from documents of users to the warns collection once per guild"""
+        if guild_id in self._migrated_warns:
+            return
+        # Concurrent calls of the guild wait for the same migration
+        if (task := self._warns_migrations.get(guild_id)) is None:
+            task = self._warns_migrations[guild_id] = asyncio.create_task(
+                self._move_legacy_warns(guild_id)
+            )
+            task.add_done_callback(lambda _: self._warns_migrations.pop(guild_id, None))
+        await asyncio.shield(task)
+
+    async def _move_legacy_warns(self, guild_id: int):
+        legacy_warns = await self._req.guild.get_legacy_warns(guild_id)
+        if not legacy_warns:
+            self._migrated_warns.add(guild_id)
+            return
+
+        # Legacy warns didn't expire, so they get expiry of the guild like new warns
+        settings = (await self.get_guild(guild_id)).settings
+        # Ids are derived from legacy warns, so warns moved before an interrupted migration
+        # aren't duplicated when it runs again
+        await self._req.warns.add_warns(
+            [
+                {
+                    "_id": self._get_legacy_warn_id(guild_id, user_id, index),
+                    "guild_id": guild_id,
+                    "user_id": user_id,
+                    **warn,
+                    "expires_at": settings.get_warn_expiry(warn["warned_at"]),
+                }
+                for user_id, warns in legacy_warns.items()
+                for index, warn in enumerate(warns)
+            ]
+        )
+        await self._req.guild.remove_legacy_warns(guild_id)
+        self._migrated_warns.add(guild_id)
+
+    @staticmethod
+    def _get_legacy_warn_id(guild_id: int, user_id: int, index: int) -> ObjectId:
+        return ObjectId(sha256(f"{guild_id}:{user_id}:{index}".encode()).digest()[:12])
+
+    async def add_warn(
+        self,
+        guild_id: int | Snowflake,
+        user_id: int | Snowflake,
+        *,
+        author_id: int,
+        warned_at: datetime,
+        reason: str | None = None,
+        expires_at: datetime | None = None,
+    ) -> int:
+        """Adds a warn to the user and returns the count of user warns"""
+        guild_id, user_id = int(guild_id), int(user_id)
+        await self._migrate_legacy_warns(guild_id)
+        await self._req.warns.add_warn(
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "author_id": author_id,
+                "reason": reason,
+                "warned_at": warned_at,
+                "expires_at": expires_at,
+            }
+        )
+        return await self._req.warns.count_warns(guild_id, user_id)
+
+    async def count_warns(self, guild_id: int | Snowflake, user_id: int | Snowflake) -> int:
+        await self._migrate_legacy_warns(int(guild_id))
+        return await self._req.warns.count_warns(int(guild_id), int(user_id))
+
+    async def get_warns(
+        self, guild_id: int | Snowflake, user_id: int | Snowflake
+    ) -> AsyncIterator[GuildUserWarn]:
+        """Streams warns of the user from the oldest one"""
+        await self._migrate_legacy_warns(int(guild_id))
+        async for document in self._req.warns.get_warns(int(guild_id), int(user_id)):
+            yield GuildUserWarn(**document)
+
+    async def set_warns_expiry(self, guild_id: int | Snowflake, days: int | None):
+        """Applies new expiry to all warns of the guild"""
+        await self._migrate_legacy_warns(int(guild_id))
+        await self._req.warns.set_warns_expiry(int(guild_id), days * 24 * 60 * 60 if days else None)
+
+    async def remove_warns(
+        self, guild_id: int | Snowflake, user_id: int | Snowflake, warn_ids: list[ObjectId]
+    ) -> int:
+        """Removes warns of the user by ids and returns the count of removed warns"""
+        return await self._req.warns.remove_warns(int(guild_id), int(user_id), warn_ids)
+
+    async def add_audit_entry(
+        self,
+        guild_id: int | Snowflake,
+        *,
+        action: str,
+        moderator_id: int,
+        user_ids: list[int],
+        failed_user_ids: list[int],
+        reason: str | None = None,
+    ):
+        """Records one entry for a moderation action applied to many users"""
+        await self._req.audit.add_entry(
+            {
+                "guild_id": int(guild_id),
+                "action": action,
+                "moderator_id": moderator_id,
+                "user_ids": user_ids,
+                "failed_user_ids": failed_user_ids,
+                "reason": reason,
+                "created_at": datetime.utcnow(),
+            }
         )
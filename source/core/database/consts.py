@@ -39,6 +39,8 @@ class OperatorType(StrEnum):
     UNSET = "$unset"
     PUSH = "$push"
     PULL = "$pull"
+    INC = "$inc"
+    SET_ON_INSERT = "$setOnInsert"
 
 
 class DocumentType(StrEnum):
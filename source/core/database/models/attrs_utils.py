@@ -71,20 +71,24 @@ class DataBaseSerializerMixin(DictSerializerMixin):
         self._database = kwargs.get("_database")
         self.guild_id = kwargs.get("guild_id")
         super().__init__(**kwargs)
+        # Raw data shares lists with attributes. Copy it to detect in-place changes.
+        self._json = self._asdict()
+
+    def _asdict(self) -> dict:
+        # Private attributes like `_json`, `_database` or indexes are not stored in the database
+        return attrs.asdict(self, filter=lambda attr, value: not attr.name.startswith("_"))
 
     def get_changes(self) -> dict:
         """Returns changes between previous data and current"""
-        _json = attrs.asdict(
-            self, filter=lambda attr, value: attr.name not in ("_json", "_database")
-        )
+        _json = self._asdict()
+        # Fields are stored in the database by their aliases
+        aliases = {attrib.name: attrib.metadata.get("alias") for attrib in self.__attrs_attrs__}
 
         data = {
-            key: value
+            aliases.get(key) or key: value
             for key, value in _json.items()
-            if (
-                ((before := self._json.get(key)) is not None and before != value)
-                and (key not in ("id", "guild_data", "guild_id"))
-            )
+            # Values which were unset before are changes too
+            if self._json.get(key, MISSING) != value and key not in ("id", "guild_data", "guild_id")
         }
         self._json = _json
         return data
@@ -145,8 +149,9 @@ def field(
 class ListMixin(DataBaseSerializerMixin):
     async def update(self):
         key = self._to_database_name(self.__class__.__name__)
+        name = self._json["name"]  # Name before changes to find the item
         data = self.get_changes()
-        document = {"_id": key, f"{key}.name": self._json["name"]}
+        document = {"_id": key, f"{key}.name": name}
         payload = {f"{key}.$.{k}": value for k, value in data.items()}
 
         await self._database.update_guild(self.guild_id, document, OperatorType.SET, payload)
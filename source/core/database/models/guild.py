@@ -1,5 +1,7 @@
 import datetime
 
+from bson import ObjectId
+
 from ..consts import Language, OperatorType
 from .attrs_utils import (
     DataBaseSerializerMixin,
@@ -13,10 +15,12 @@ from .attrs_utils import (
 
 __all__ = [
     "GuildUserLeveling",
+    "GuildUserWarn",
     "GuildUser",
     "GuildSettings",
     "GuildAutoRole",
     "GuildTag",
+    "GuildTagBody",
     "GuildVoiceLobbies",
     "GuildLeveling",
     "GuildMessageData",
@@ -34,9 +38,15 @@ class GuildUserLeveling(DictSerializerMixin):
 
 @define()
 class GuildUserWarn(DictSerializerMixin):
+    """Warn of a member. Warns are stored in own collection, so they aren't a part of a user"""
+
+    id: ObjectId = field(alias="_id", default=None)
+    user_id: int = field()
     author_id: int = field()
     reason: str | None = field(default=None)
     warned_at: datetime.datetime = field()
+    # Expired warns are removed by TTL index of the collection
+    expires_at: datetime.datetime | None = field(default=None)
 
 
 @define()
@@ -45,17 +55,6 @@ class GuildUser(DataBaseSerializerMixin):
     leveling: GuildUserLeveling = field(converter=GuildUserLeveling, default=None)
     voice_time: int = field(default=0, alias="voice_time_count")
     music_playlists: list[str] = field(factory=list)
-    warns: list[GuildUserWarn] = field(converter=convert_list(GuildUserWarn))
-
-    def add_warn(
-        self, author_id: int, warned_at: datetime.datetime, reason: str | None = None
-    ) -> GuildUserWarn:
-        warn = GuildUserWarn(author_id=author_id, reason=reason, warned_at=warned_at)
-        self.warns.append(warn)
-        return warn
-
-    def remove_warn(self, index: int) -> None:
-        self.warns.pop(index)
 
     async def update(self):
         await self._database.update_user(self.guild_id, self.id, self.get_changes())
@@ -68,6 +67,14 @@ class GuildSettings(DataBaseSerializerMixin):
     disabled_commands: list[str] = field(factory=list)
     suggested_russian: bool = field(default=False)
     warns_limit: int = field(default=None)
+    # Days after which warns expire. Warns never expire if it's not set
+    warns_expire_days: int = field(default=None)
+    spam_detection: bool = field(default=False)
+
+    def get_warn_expiry(self, warned_at: datetime.datetime) -> datetime.datetime | None:
+        if not self.warns_expire_days:
+            return None
+        return warned_at + datetime.timedelta(days=self.warns_expire_days)
 
     async def update(self):
         await self._database.update_guild(
@@ -85,17 +92,37 @@ class GuildAutoRole(ListMixin):
     component: dict = field()
 
 
+@define()
+class GuildTagBody(DictSerializerMixin):
+    title: str | None = field(default=None)
+    description: str = field()
+
+
 @define()
 class GuildTag(ListMixin):
+    """Metadata of a tag. Body of the tag is loaded on demand with `get_body`"""
+
     name: str = field()
-    title: str = field()
-    description: str = field()
     author_id: int = field()
     is_embed: bool = field()
     created_at: int = field()
     last_edited_at: int = field()
     uses_count: int = field()
 
+    async def get_body(self) -> GuildTagBody | None:
+        return await self._database.get_tag_body(self.guild_id, self.name)
+
+    async def set_body(self, *, title: str | None, description: str):
+        await self._database.update_tag_body(
+            self.guild_id, self.name, title=title, description=description
+        )
+
+    async def update(self):
+        name = self._json["name"]
+        await super().update()
+        if name != self.name:
+            self._database.tag_bodies.pop((self.guild_id, name))
+
 
 @define()
 class VoiceLobby(DictSerializerMixin):
@@ -110,20 +137,48 @@ class GuildVoiceLobbies(DataBaseSerializerMixin):
     voice_channel_id: int = field()
     text_channel_id: int | None = field(default=None)
     private_lobbies: bool = field()
-
-    def get_lobby(self, channel_id: int = None, owner_id: int = None):
-        for channel in self.active_channels:
-            if channel.channel_id == channel_id or channel.owner_id == owner_id:
-                return channel
+    pool_size: int = field(default=0)
+    pooled_channels: list[int] = field(factory=list)
+    _lobbies_by_channel: dict[int, VoiceLobby] = field(init=False, repr=False, factory=dict)
+    _lobbies_by_owner: dict[int, VoiceLobby] = field(init=False, repr=False, factory=dict)
+
+    def __attrs_post_init__(self):
+        for lobby in self.active_channels:
+            self._lobbies_by_channel[lobby.channel_id] = lobby
+            self._lobbies_by_owner[lobby.owner_id] = lobby
+
+    def get_lobby(self, channel_id: int = None, owner_id: int = None) -> VoiceLobby | None:
+        if channel_id is not None and (lobby := self._lobbies_by_channel.get(channel_id)):
+            return lobby
+        if owner_id is not None:
+            return self._lobbies_by_owner.get(owner_id)
 
     def add_channel(self, channel_id: int, owner_id: int) -> VoiceLobby:
         lobby = VoiceLobby(channel_id=channel_id, owner_id=owner_id)
         self.active_channels.append(lobby)
+        self._lobbies_by_channel[channel_id] = lobby
+        self._lobbies_by_owner[owner_id] = lobby
         return lobby
 
+    def set_owner(self, lobby: VoiceLobby, owner_id: int):
+        if self._lobbies_by_owner.get(lobby.owner_id) is lobby:
+            del self._lobbies_by_owner[lobby.owner_id]
+        lobby.owner_id = owner_id
+        self._lobbies_by_owner[owner_id] = lobby
+
+    def claim_pooled_channel(self) -> int | None:
+        """Takes a pre-created channel from the warm pool"""
+        if self.pooled_channels:
+            return self.pooled_channels.pop()
+
     def remove_lobby(self, channel_id: int = None, owner_id: int = None):
         lobby = self.get_lobby(channel_id=channel_id, owner_id=owner_id)
+        if lobby is None:
+            return
         self.active_channels.remove(lobby)
+        del self._lobbies_by_channel[lobby.channel_id]
+        if self._lobbies_by_owner.get(lobby.owner_id) is lobby:
+            del self._lobbies_by_owner[lobby.owner_id]
 
     async def update(self):
         key = self._to_database_name(self.__class__.__name__)
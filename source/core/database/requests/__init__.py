@@ -1,2 +1,5 @@
+from .audit_requests import AuditRequests  # noqa
 from .base import Requests  # noqa
 from .guild_requests import GuildRequests  # noqa
+from .music_requests import MusicRequests  # noqa
+from .warn_requests import WarnRequests  # noqa
@@ -0,0 +1,10 @@
+from ..consts import AsyncCollection, AsyncMongoClient
+
+
+class AuditRequests:
+    def __init__(self, client):
+        self._client: AsyncMongoClient = client
+        self._entries: AsyncCollection = client["moderation"]["audit"]
+
+    async def add_entry(self, data: dict) -> None:
+        await self._entries.insert_one(data)
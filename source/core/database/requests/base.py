@@ -1,7 +1,13 @@
 from ..consts import AsyncMongoClient
+from .audit_requests import AuditRequests
 from .guild_requests import GuildRequests
+from .music_requests import MusicRequests
+from .warn_requests import WarnRequests
 
 
 class Requests:
     def __init__(self, client: AsyncMongoClient):
         self.guild = GuildRequests(client)
+        self.music = MusicRequests(client)
+        self.warns = WarnRequests(client)
+        self.audit = AuditRequests(client)
@@ -1,3 +1,5 @@
+from pymongo import UpdateOne
+
 from ..consts import AsyncCollection, AsyncDatabase, AsyncMongoClient, DocumentType, OperatorType
 
 
@@ -14,7 +16,9 @@ class GuildRequests:
 
     async def get_guild_raw_data(self, guild_id: int) -> dict:
         main_collection = self.__get_collection(guild_id, "configuration")
-        data = [doc async for doc in main_collection.find()]
+        # Bodies of tags are loaded on demand
+        projection = {"tags.title": False, "tags.description": False}
+        data = [doc async for doc in main_collection.find(projection=projection)]
         full_data = {}
         for document in data:
             id = document["_id"]
@@ -56,6 +60,32 @@ class GuildRequests:
             guild_id, "configuration", filter=document, operator=operator, data=data
         )
 
+    async def get_tag_body(self, guild_id: int, name: str) -> dict | None:
+        collection = self.__get_collection(guild_id, "configuration")
+        document = await collection.find_one(
+            {"_id": DocumentType.TAGS}, {"tags": {"$elemMatch": {"name": name}}}
+        )
+        if document is None or not document.get("tags"):
+            return
+        tag = document["tags"][0]
+        return {"title": tag.get("title"), "description": tag.get("description")}
+
+    async def increment_tags_uses(self, guild_id: int, uses: dict[str, int]) -> None:
+        if not uses:
+            return
+        increments = {}
+        array_filters = []
+        for index, (name, count) in enumerate(uses.items()):
+            increments[f"tags.$[tag{index}].uses_count"] = count
+            array_filters.append({f"tag{index}.name": name})
+
+        collection = self.__get_collection(guild_id, "configuration")
+        await collection.update_one(
+            {"_id": DocumentType.TAGS},
+            {OperatorType.INC: increments},
+            array_filters=array_filters,
+        )
+
     async def add_guild(self, guild_id: int) -> dict:
         data = {"_id": "configuration", "language": "en-US"}
         await self.__insert_document(str(guild_id), "configuration", data=data)
@@ -83,3 +113,24 @@ class GuildRequests:
         await self.__update_document(
             guild_id, "users", filter=str(user_id), operator=OperatorType.SET, data=data
         )
+
+    async def get_legacy_warns(self, guild_id: int) -> dict[int, list[dict]]:
+        """Returns warns which are stored in documents of users"""
+        collection = self.__get_collection(guild_id, "users")
+        cursor = collection.find({"warns": {"$exists": True}}, projection={"warns": True})
+        return {int(document["_id"]): document["warns"] async for document in cursor}
+
+    async def remove_legacy_warns(self, guild_id: int) -> None:
+        collection = self.__get_collection(guild_id, "users")
+        await collection.update_many(
+            {"warns": {"$exists": True}}, {OperatorType.UNSET: {"warns": ""}}
+        )
+
+    async def increment_users(self, guild_id: int, increments: dict[int, dict[str, int]]) -> None:
+        operations = [
+            UpdateOne({"_id": str(user_id)}, {OperatorType.INC: data}, upsert=True)
+            for user_id, data in increments.items()
+        ]
+        if operations:
+            collection = self.__get_collection(guild_id, "users")
+            await collection.bulk_write(operations, ordered=False)
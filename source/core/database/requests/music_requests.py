@@ -0,0 +1,16 @@
+from ..consts import AsyncCollection, AsyncMongoClient
+
+
+class MusicRequests:
+    def __init__(self, client):
+        self._client: AsyncMongoClient = client
+        self._queues: AsyncCollection = client["music"]["queues"]
+
+    async def get_queues(self) -> list[dict]:
+        return [document async for document in self._queues.find()]
+
+    async def save_queue(self, guild_id: int, data: dict) -> None:
+        await self._queues.replace_one({"_id": str(guild_id)}, data, upsert=True)
+
+    async def remove_queue(self, guild_id: int) -> None:
+        await self._queues.delete_one({"_id": str(guild_id)})
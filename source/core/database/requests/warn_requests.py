@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from ..consts import AsyncCollection, AsyncMongoClient, OperatorType
+
+
+class WarnRequests:
+    def __init__(self, client):
+        self._client: AsyncMongoClient = client
+        self._warns: AsyncCollection = client["moderation"]["warns"]
+
+    async def create_indexes(self) -> None:
+        await self._warns.create_index(
+            [("guild_id", ASCENDING), ("user_id", ASCENDING), ("warned_at", ASCENDING)]
+        )
+        # Documents without `expires_at` never expire
+        await self._warns.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def _get_active_filter(guild_id: int, user_id: int) -> dict:
+        # TTL monitor removes expired warns once per minute, so they are filtered until then
+        return {
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "$or": [{"expires_at": None}, {"expires_at": {"$gt": datetime.utcnow()}}],
+        }
+
+    async def add_warn(self, data: dict) -> ObjectId:
+        result = await self._warns.insert_one(data)
+        return result.inserted_id
+
+    async def add_warns(self, warns: list[dict]) -> None:
+        """Inserts warns with set ids. Warns which ids already exist are left as they are"""
+        operations = [
+            UpdateOne({"_id": warn["_id"]}, {OperatorType.SET_ON_INSERT: warn}, upsert=True)
+            for warn in warns
+        ]
+        if operations:
+            await self._warns.bulk_write(operations, ordered=False)
+
+    async def count_warns(self, guild_id: int, user_id: int) -> int:
+        return await self._warns.count_documents(self._get_active_filter(guild_id, user_id))
+
+    def get_warns(self, guild_id: int, user_id: int):
+        return self._warns.find(self._get_active_filter(guild_id, user_id)).sort(
+            "warned_at", ASCENDING
+        )
+
+    async def remove_warns(self, guild_id: int, user_id: int, warn_ids: list[ObjectId]) -> int:
+        result = await self._warns.delete_many(
+            {"guild_id": guild_id, "user_id": user_id, "_id": {"$in": warn_ids}}
+        )
+        return result.deleted_count
+
+    async def set_warns_expiry(self, guild_id: int, expire_seconds: int | None) -> None:
+        """Recalculates expiry of existing warns of the guild. Empty `expire_seconds` to disable"""
+        if not expire_seconds:
+            await self._warns.update_many(
+                {"guild_id": guild_id}, {OperatorType.UNSET: {"expires_at": ""}}
+            )
+            return
+        # Adding milliseconds to a date gives a date
+        await self._warns.update_many(
+            {"guild_id": guild_id},
+            [{OperatorType.SET: {"expires_at": {"$add": ["$warned_at", expire_seconds * 1000]}}}],
+        )
+
+    async def remove_guild_warns(self, guild_id: int) -> None:
+        await self._warns.delete_many({"guild_id": guild_id})
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from .metrics import metrics
+
+__all__ = ["Debouncer"]
+
+log = logging.getLogger(__name__)
+_K = TypeVar("_K", bound=Hashable)
+
+
+class Debouncer(Generic[_K]):
+    """
+    Calls the callback for a key once per delay window no matter how many times the key
+    was touched in this window. Calls for the same key never run concurrently.
+    """
+
+    def __init__(self, delay: float, callback: Callable[[_K], Awaitable], *, name: str):
+        self.delay: float = delay
+        self.callback = callback
+        self.name: str = name
+        self._handles: dict[_K, asyncio.TimerHandle] = {}
+        self._running: dict[_K, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def touch(self, key: _K):
+        """Schedules the callback for the key if it isn't scheduled yet"""
+        if key in self._handles:
+            metrics.increment(f"debounce.{self.name}.coalesced")
+            return
+        loop = asyncio.get_running_loop()
+        self._handles[key] = loop.call_later(self.delay, self._fire, key)
+
+    def _fire(self, key: _K):
+        self._handles.pop(key, None)
+        self._running[key] = asyncio.create_task(self._run(key, self._running.get(key)))
+
+    async def _run(self, key: _K, previous: asyncio.Task | None = None):
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await self.callback(key)
+        except Exception:
+            metrics.increment(f"debounce.{self.name}.errors")
+            log.exception(f"Failed to flush `{self.name}` for {key!r}")
+        else:
+            metrics.increment(f"debounce.{self.name}.flushed")
+        finally:
+            if self._running.get(key) is asyncio.current_task():
+                del self._running[key]
+
+    async def flush(self):
+        """Immediately calls the callback for every scheduled key and waits for running calls"""
+        handles, self._handles = self._handles, {}
+        for key, handle in handles.items():
+            handle.cancel()
+            self._running[key] = asyncio.create_task(self._run(key, self._running.get(key)))
+        if self._running:
+            await asyncio.wait(list(self._running.values()))
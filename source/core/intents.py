@@ -0,0 +1,94 @@
+from interactions import Intents
+
+__all__ = ["INTENTS_EVENTS", "get_intents_report"]
+
+
+INTENTS_EVENTS: dict[Intents, tuple[str, ...]] = {
+    Intents.GUILDS: (
+        "GUILD_CREATE",
+        "GUILD_UPDATE",
+        "GUILD_DELETE",
+        "GUILD_ROLE_CREATE",
+        "GUILD_ROLE_UPDATE",
+        "GUILD_ROLE_DELETE",
+        "CHANNEL_CREATE",
+        "CHANNEL_UPDATE",
+        "CHANNEL_DELETE",
+        "CHANNEL_PINS_UPDATE",
+        "THREAD_CREATE",
+        "THREAD_UPDATE",
+        "THREAD_DELETE",
+        "THREAD_LIST_SYNC",
+        "THREAD_MEMBER_UPDATE",
+        "STAGE_INSTANCE_CREATE",
+        "STAGE_INSTANCE_UPDATE",
+        "STAGE_INSTANCE_DELETE",
+    ),
+    Intents.GUILD_MEMBERS: (
+        "GUILD_MEMBER_ADD",
+        "GUILD_MEMBER_UPDATE",
+        "GUILD_MEMBER_REMOVE",
+        "THREAD_MEMBERS_UPDATE",
+    ),
+    Intents.GUILD_BANS: ("GUILD_BAN_ADD", "GUILD_BAN_REMOVE"),
+    Intents.GUILD_EMOJIS_AND_STICKERS: ("GUILD_EMOJIS_UPDATE", "GUILD_STICKERS_UPDATE"),
+    Intents.GUILD_INTEGRATIONS: (
+        "GUILD_INTEGRATIONS_UPDATE",
+        "INTEGRATION_CREATE",
+        "INTEGRATION_UPDATE",
+        "INTEGRATION_DELETE",
+    ),
+    Intents.GUILD_WEBHOOKS: ("WEBHOOKS_UPDATE",),
+    Intents.GUILD_INVITES: ("INVITE_CREATE", "INVITE_DELETE"),
+    Intents.GUILD_VOICE_STATES: ("VOICE_STATE_UPDATE",),
+    Intents.GUILD_PRESENCES: ("PRESENCE_UPDATE",),
+    Intents.GUILD_MESSAGES: (
+        "MESSAGE_CREATE",
+        "MESSAGE_UPDATE",
+        "MESSAGE_DELETE",
+        "MESSAGE_DELETE_BULK",
+    ),
+    Intents.GUILD_MESSAGE_REACTIONS: (
+        "MESSAGE_REACTION_ADD",
+        "MESSAGE_REACTION_REMOVE",
+        "MESSAGE_REACTION_REMOVE_ALL",
+        "MESSAGE_REACTION_REMOVE_EMOJI",
+    ),
+    Intents.GUILD_MESSAGE_TYPING: ("TYPING_START",),
+    Intents.DIRECT_MESSAGES: (
+        "DM_MESSAGE_CREATE",
+        "DM_MESSAGE_UPDATE",
+        "DM_MESSAGE_DELETE",
+        "DM_CHANNEL_PINS_UPDATE",
+    ),
+    Intents.DIRECT_MESSAGE_REACTIONS: (
+        "DM_MESSAGE_REACTION_ADD",
+        "DM_MESSAGE_REACTION_REMOVE",
+        "DM_MESSAGE_REACTION_REMOVE_ALL",
+        "DM_MESSAGE_REACTION_REMOVE_EMOJI",
+    ),
+    Intents.DIRECT_MESSAGE_TYPING: ("DM_TYPING_START",),
+    Intents.GUILD_SCHEDULED_EVENTS: (
+        "GUILD_SCHEDULED_EVENT_CREATE",
+        "GUILD_SCHEDULED_EVENT_UPDATE",
+        "GUILD_SCHEDULED_EVENT_DELETE",
+        "GUILD_SCHEDULED_EVENT_USER_ADD",
+        "GUILD_SCHEDULED_EVENT_USER_REMOVE",
+    ),
+}
+
+
+def get_intents_report(intents: Intents) -> tuple[list[str], list[str]]:
+    """
+    Returns gateway events which will be decoded and events which will be dropped
+    by Discord with given intents.
+    """
+    decoded = []
+    dropped = []
+    for intent, events in INTENTS_EVENTS.items():
+        if intent in intents:
+            decoded.extend(events)
+        else:
+            dropped.extend(events)
+
+    return decoded, dropped
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+__all__ = ["Timing", "Metrics", "metrics"]
+
+
+class Timing:
+    __slots__ = ("count", "total", "max")
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__} count={self.count} "
+            f"mean={self.mean:.6f}s max={self.max:.6f}s>"
+        )
+
+    def __init__(self):
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class Metrics:
+    """In-memory counters, gauges and timings of the bot"""
+
+    __slots__ = ("counters", "gauges", "timings")
+
+    def __init__(self):
+        self.counters: defaultdict[str, int] = defaultdict(int)
+        self.gauges: dict[str, float] = {}
+        self.timings: defaultdict[str, Timing] = defaultdict(Timing)
+
+    def increment(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        self.timings[name].observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "timings": {
+                name: {"count": timing.count, "mean": timing.mean, "max": timing.max}
+                for name, timing in self.timings.items()
+            },
+        }
+
+
+metrics = Metrics()
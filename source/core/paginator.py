@@ -0,0 +1,222 @@
+from itertools import count
+from time import time
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Generic, Sequence, TypeVar
+
+from interactions import ActionRow, Button, ButtonStyle, Color, Embed
+
+from .cache import LRUStorage
+
+if TYPE_CHECKING:
+    from .context import CommandContext, ComponentContext
+    from .router import ComponentRouter
+
+__all__ = [
+    "PageSource",
+    "ListPageSource",
+    "AsyncIteratorPageSource",
+    "Paginator",
+    "PaginatorManager",
+]
+
+_T = TypeVar("_T")
+# (index of item starting with 1, item)
+PageItems = list[tuple[int, _T]]
+
+PAGINATOR_NAMESPACE = "paginator"
+# Every author keeps a few recent paginators, so busy guilds don't evict paginators of others
+MAX_SESSIONS_PER_AUTHOR = 8
+MAX_AUTHORS = 1024
+
+
+class PageSource(Generic[_T]):
+    """Source of items for a paginator. Only items of requested page are loaded"""
+
+    def __init__(self, per_page: int):
+        self.per_page: int = per_page
+
+    @property
+    def pages_count(self) -> int | None:
+        """The count of pages if it's known"""
+        return None
+
+    async def get_page(self, page: int) -> tuple[PageItems, bool]:
+        """Returns items of the page and whether the next page exists"""
+        raise NotImplementedError
+
+
+class ListPageSource(PageSource[_T]):
+    def __init__(self, items: Sequence[_T], per_page: int):
+        super().__init__(per_page)
+        self.items: Sequence[_T] = items
+
+    @property
+    def pages_count(self) -> int:
+        return max(1, -(-len(self.items) // self.per_page))
+
+    async def get_page(self, page: int) -> tuple[PageItems, bool]:
+        start = page * self.per_page
+        items = self.items[start : start + self.per_page]
+        return list(enumerate(items, start=start + 1)), start + self.per_page < len(self.items)
+
+
+class AsyncIteratorPageSource(PageSource[_T]):
+    """
+    Streams items from an async iterator like a database cursor.
+    Iterator is consumed only up to the requested page, consumed items are kept for going back.
+    """
+
+    def __init__(self, iterator: AsyncIterator[_T], per_page: int):
+        super().__init__(per_page)
+        self.iterator: AsyncIterator[_T] = iterator
+        self.items: list[_T] = []
+        self.exhausted: bool = False
+
+    @property
+    def pages_count(self) -> int | None:
+        if not self.exhausted:
+            return None
+        return max(1, -(-len(self.items) // self.per_page))
+
+    async def _fill(self, size: int):
+        while not self.exhausted and len(self.items) < size:
+            try:
+                self.items.append(await self.iterator.__anext__())
+            except StopAsyncIteration:
+                self.exhausted = True
+
+    async def get_page(self, page: int) -> tuple[PageItems, bool]:
+        start = page * self.per_page
+        # One more item to know whether the next page exists
+        await self._fill(start + self.per_page + 1)
+        items = self.items[start : start + self.per_page]
+        return list(enumerate(items, start=start + 1)), start + self.per_page < len(self.items)
+
+
+class Paginator(Generic[_T]):
+    """
+    Renders one page of a source into an embed with navigation buttons.
+
+    :param source: The source of items
+    :param author_id: The id of user who can switch pages
+    :param formatter: The function which formats an item with its index into a line
+    :param embed_factory: The function which creates an embed for a page
+    :param components_factory: The coroutine function which creates extra components for a page
+    """
+
+    def __init__(
+        self,
+        source: PageSource[_T],
+        *,
+        author_id: int,
+        formatter: Callable[[int, _T], str],
+        title: str = None,
+        embed_factory: Callable[[], Embed] = None,
+        components_factory: Callable[
+            ["CommandContext | ComponentContext", PageItems], Awaitable[list]
+        ] = None,
+    ):
+        self.source: PageSource[_T] = source
+        self.author_id: int = author_id
+        self.formatter = formatter
+        self.title: str | None = title
+        self.embed_factory = embed_factory
+        self.components_factory = components_factory
+        self.page: int = 0
+        self.id: int | None = None
+
+    def _create_embed(self) -> Embed:
+        if self.embed_factory is not None:
+            return self.embed_factory()
+        return Embed(title=self.title, color=Color.BLURPLE)
+
+    def _get_buttons(self, has_next: bool) -> list[Button]:
+        pages_count = self.source.pages_count
+        return [
+            Button(
+                label="◀",
+                custom_id=f"{PAGINATOR_NAMESPACE}|{self.author_id}|{self.id}|prev",
+                style=ButtonStyle.SECONDARY,
+                disabled=self.page == 0,
+            ),
+            Button(
+                label=f"{self.page + 1}/{pages_count or '?'}",
+                custom_id=f"{PAGINATOR_NAMESPACE}|{self.author_id}|{self.id}|page",
+                style=ButtonStyle.SECONDARY,
+                disabled=True,
+            ),
+            Button(
+                label="▶",
+                custom_id=f"{PAGINATOR_NAMESPACE}|{self.author_id}|{self.id}|next",
+                style=ButtonStyle.SECONDARY,
+                disabled=not has_next,
+            ),
+        ]
+
+    async def render(
+        self, ctx: "CommandContext | ComponentContext"
+    ) -> tuple[Embed, list[ActionRow]]:
+        items, has_next = await self.source.get_page(self.page)
+        while not items and self.page > 0:
+            # Source became shorter since the last render
+            self.page -= 1
+            items, has_next = await self.source.get_page(self.page)
+        embed = self._create_embed()
+        embed.description = "\n".join(self.formatter(index, item) for index, item in items)
+
+        components = []
+        if self.components_factory is not None and items:
+            if extra_components := await self.components_factory(ctx, items):
+                components.append(ActionRow(components=extra_components))
+        if self.page > 0 or has_next:
+            components.append(ActionRow(components=self._get_buttons(has_next)))
+
+        return embed, components
+
+
+class PaginatorManager:
+    """
+    Keeps active paginators and switches their pages.
+    Paginators are routed by `paginator|<author id>|<id>|<action>` custom id.
+    """
+
+    def __init__(self, router: "ComponentRouter"):
+        # author id: recent paginators of the author
+        self.paginators: LRUStorage[LRUStorage[Paginator]] = LRUStorage(MAX_AUTHORS)
+        # Ids aren't reused after restart, so buttons of old messages don't match new paginators
+        self._ids = count(int(time() * 1000))
+        router.add_route(PAGINATOR_NAMESPACE, self.dispatch)
+
+    def add(self, paginator: Paginator) -> Paginator:
+        paginator.id = next(self._ids)
+        if (sessions := self.paginators[paginator.author_id]) is None:
+            sessions = self.paginators[paginator.author_id] = LRUStorage(MAX_SESSIONS_PER_AUTHOR)
+        sessions[paginator.id] = paginator
+        return paginator
+
+    async def send(
+        self,
+        ctx: "CommandContext | ComponentContext",
+        paginator: Paginator,
+        *,
+        ephemeral: bool = False,
+    ):
+        self.add(paginator)
+        embed, components = await paginator.render(ctx)
+        await ctx.send(embeds=embed, components=components, ephemeral=ephemeral)
+
+    async def dispatch(self, ctx: "ComponentContext"):
+        _, author_id, paginator_id, action = ctx.custom_id.split("|")
+        if int(ctx.author.id) != int(author_id):
+            return await ctx.send(ctx.translate("PAGINATOR_NOT_AUTHOR"), ephemeral=True)
+        sessions = self.paginators[int(author_id)]
+        paginator = sessions[int(paginator_id)] if sessions is not None else None
+        if paginator is None:
+            return await ctx.send(ctx.translate("PAGINATOR_EXPIRED"), ephemeral=True)
+
+        if action == "prev":
+            paginator.page = max(0, paginator.page - 1)
+        elif action == "next":
+            paginator.page += 1
+
+        embed, components = await paginator.render(ctx)
+        await ctx.edit(embeds=embed, components=components)
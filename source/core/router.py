@@ -0,0 +1,62 @@
+from time import perf_counter
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from .context import ComponentContext
+
+__all__ = ["ComponentRouter"]
+
+ComponentHandler = Callable[["ComponentContext"], Awaitable]
+
+
+class ComponentRouter:
+    """
+    Routes component interactions to exactly one handler.
+
+    Route is a namespace of the component custom id, the part before the first `|`.
+    For example, `button_autorole|123` is routed to `button_autorole` handler.
+    """
+
+    __slots__ = "routes"
+
+    def __init__(self):
+        self.routes: dict[str, ComponentHandler] = {}
+
+    @staticmethod
+    def get_namespace(custom_id: str) -> str:
+        return custom_id.partition("|")[0]
+
+    @staticmethod
+    def _is_same_handler(first: ComponentHandler, second: ComponentHandler) -> bool:
+        # Methods of a reloaded extension are other objects of the same function
+        return (first.__module__, first.__qualname__) == (second.__module__, second.__qualname__)
+
+    def add_route(self, namespace: str, handler: ComponentHandler):
+        """
+        Adds the route. Reloaded extension replaces its own routes,
+        because it's torn down after the new one is loaded.
+        """
+        if (current := self.routes.get(namespace)) is not None:
+            if not self._is_same_handler(current, handler):
+                raise ValueError(f"Route `{namespace}` already registered")
+        self.routes[namespace] = handler
+
+    def remove_route(self, namespace: str, handler: ComponentHandler = None):
+        """Removes the route. If `handler` is passed, the route is removed only if it's routed to it"""
+        if handler is None or self.routes.get(namespace) == handler:
+            self.routes.pop(namespace, None)
+
+    async def dispatch(self, ctx: "ComponentContext"):
+        namespace = self.get_namespace(ctx.custom_id)
+        handler = self.routes.get(namespace)
+        if handler is None:
+            metrics.increment("components.unrouted")
+            return
+
+        start = perf_counter()
+        try:
+            await handler(ctx)
+        finally:
+            metrics.observe(f"components.{namespace}", perf_counter() - start)
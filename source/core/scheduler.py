@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import logging
+from enum import IntEnum
+from itertools import count
+from time import monotonic
+from typing import Any, Awaitable, Callable, Coroutine, Hashable
+
+from .metrics import metrics
+
+log = logging.getLogger(__name__)
+
+__all__ = ["Priority", "TokenBucket", "RequestScheduler"]
+
+
+class Priority(IntEnum):
+    """
+    Representing priority classes of REST requests. Lower value is served first
+    """
+
+    INTERACTION = 0
+    USER_VISIBLE = 1
+    BACKGROUND = 2
+
+
+# Approximated Discord limits per bucket kind: (requests, per seconds).
+# HTTP client still handles 429 responses, these limits just avoid hitting them.
+BUCKET_LIMITS: dict[str, tuple[int, float]] = {
+    "channel": (5, 5.0),
+    "guild_channels": (5, 5.0),
+    "member": (10, 10.0),
+    "message": (5, 5.0),
+}
+DEFAULT_BUCKET_LIMIT: tuple[int, float] = (5, 5.0)
+GLOBAL_LIMIT: tuple[int, float] = (50, 1.0)
+# Tokens of global limit which background requests can't use
+BACKGROUND_RESERVE: int = 10
+
+
+class TokenBucket:
+    __slots__ = ("rate", "per", "tokens", "updated_at")
+
+    def __init__(self, rate: int, per: float):
+        self.rate: int = rate
+        self.per: float = per
+        self.tokens: float = rate
+        self.updated_at: float = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate / self.per)
+        self.updated_at = now
+
+    def try_acquire(self, reserve: int = 0) -> float:
+        """Takes a token if available. Returns delay to wait before next attempt otherwise"""
+        self._refill()
+        if self.tokens - reserve >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 + reserve - self.tokens) * self.per / self.rate
+
+    async def acquire(self, reserve: int = 0):
+        while (delay := self.try_acquire(reserve)) > 0:
+            await asyncio.sleep(delay)
+
+
+class _ScheduledRequest:
+    __slots__ = (
+        "priority",
+        "index",
+        "func",
+        "args",
+        "kwargs",
+        "key",
+        "bucket",
+        "future",
+        "created_at",
+    )
+
+    def __init__(
+        self,
+        priority: Priority,
+        index: int,
+        func: Callable[..., Awaitable],
+        args: tuple,
+        kwargs: dict,
+        key: Hashable | None,
+        bucket: str,
+        future: asyncio.Future,
+    ):
+        self.priority = priority
+        self.index = index
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.bucket = bucket
+        self.future = future
+        self.created_at = monotonic()
+
+    def __lt__(self, other: "_ScheduledRequest") -> bool:
+        return (self.priority, self.index) < (other.priority, other.index)
+
+
+class _Bucket:
+    __slots__ = ("limiter", "queue", "worker", "wakeup")
+
+    def __init__(self, rate: int, per: float):
+        self.limiter = TokenBucket(rate, per)
+        self.queue: list[_ScheduledRequest] = []
+        self.worker: asyncio.Task | None = None
+        # Set when a request is added, so the waiting worker rechecks the first request
+        self.wakeup = asyncio.Event()
+
+
+class RequestScheduler:
+    """
+    Schedules REST requests of all extensions.
+
+    Every request belongs to a bucket like `channel:<channel_id>`. Requests of a bucket are sent
+    in order of priority and within bucket and global limits. Pending requests with the same
+    key are coalesced: keyword arguments are merged and the newest values win.
+    """
+
+    def __init__(self):
+        self._buckets: dict[str, _Bucket] = {}
+        self._pending: dict[Hashable, _ScheduledRequest] = {}
+        self._global = TokenBucket(*GLOBAL_LIMIT)
+        self._counter = count()
+        # Running tasks are referenced, so they aren't garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _get_limit(bucket: str) -> tuple[int, float]:
+        return BUCKET_LIMITS.get(bucket.partition(":")[0], DEFAULT_BUCKET_LIMIT)
+
+    async def request(
+        self,
+        func: Callable[..., Awaitable],
+        *args,
+        bucket: str,
+        priority: Priority = Priority.USER_VISIBLE,
+        key: Hashable = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Schedules a request and waits for its result.
+
+        :param func: The coroutine function which makes request
+        :param bucket: The rate limit bucket of request
+        :param priority: The priority class of request
+        :param key: The key to coalesce repeated modifications of the same resource
+        """
+        if key is not None and (pending := self._pending.get(key)) is not None:
+            pending.func = func
+            pending.args = args
+            pending.kwargs |= kwargs
+            if priority < pending.priority:
+                # Merged request is served with the highest priority of coalesced requests
+                pending.priority = priority
+                _bucket = self._buckets[pending.bucket]
+                heapq.heapify(_bucket.queue)
+                _bucket.wakeup.set()
+            metrics.increment("scheduler.coalesced")
+            return await asyncio.shield(pending.future)
+
+        if (_bucket := self._buckets.get(bucket)) is None:
+            _bucket = self._buckets[bucket] = _Bucket(*self._get_limit(bucket))
+
+        request = _ScheduledRequest(
+            priority,
+            next(self._counter),
+            func,
+            args,
+            kwargs,
+            key,
+            bucket,
+            asyncio.get_running_loop().create_future(),
+        )
+        if key is not None:
+            self._pending[key] = request
+        heapq.heappush(_bucket.queue, request)
+        _bucket.wakeup.set()
+        metrics.increment(f"scheduler.requests.{priority.name.lower()}")
+
+        if _bucket.worker is None or _bucket.worker.done():
+            _bucket.worker = self._create_task(self._process_bucket(bucket, _bucket))
+
+        return await asyncio.shield(request.future)
+
+    async def _process_bucket(self, name: str, bucket: _Bucket):
+        while bucket.queue:
+            await bucket.limiter.acquire()
+            while True:
+                request = bucket.queue[0]
+                reserve = BACKGROUND_RESERVE if request.priority is Priority.BACKGROUND else 0
+                if (delay := self._global.try_acquire(reserve)) <= 0:
+                    break
+                # Request stays in the queue while waiting for the global limit,
+                # so a request with higher priority added meanwhile is sent first
+                bucket.wakeup.clear()
+                try:
+                    await asyncio.wait_for(bucket.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            heapq.heappop(bucket.queue)
+
+            if request.key is not None:
+                self._pending.pop(request.key, None)
+            metrics.observe(
+                f"scheduler.wait.{request.priority.name.lower()}", monotonic() - request.created_at
+            )
+            self._create_task(self._run(request))
+
+        # Bucket is kept until its limit is restored to not lose tracked tokens
+        asyncio.get_running_loop().call_later(bucket.limiter.per, self._drop_bucket, name)
+
+    def _create_task(self, coro: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and (error := task.exception()) is not None:
+            metrics.increment("scheduler.errors")
+            log.error("Scheduler task failed", exc_info=error)
+
+    def _drop_bucket(self, name: str):
+        bucket = self._buckets.get(name)
+        if bucket is not None and not bucket.queue and bucket.worker.done():
+            del self._buckets[name]
+
+    @staticmethod
+    async def _run(request: _ScheduledRequest):
+        try:
+            result = await request.func(*request.args, **request.kwargs)
+        except Exception as error:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
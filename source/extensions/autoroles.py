@@ -1,3 +1,8 @@
+import asyncio
+import logging
+from time import perf_counter
+from typing import Final
+
 from interactions import (
     ActionRow,
     Button,
@@ -6,6 +11,7 @@ from interactions import (
     Embed,
     EmbedField,
     Extension,
+    Intents,
     Member,
     OptionType,
     Role,
@@ -16,9 +22,10 @@ from interactions import extension_command as command
 from interactions import extension_listener as listener
 from interactions import option
 
-from core import Asteroid, BotException, Mention, StrEnum
+from core import Asteroid, BotException, Mention, Priority, StrEnum
 from core.context import CommandContext, ComponentContext
-from utils import create_embed, get_emoji_from_str
+from core.metrics import metrics
+from utils import create_embed, get_emoji_from_str, try_run
 
 COLORS = {
     "Blue": ButtonStyle.PRIMARY.value,
@@ -27,6 +34,10 @@ COLORS = {
     "Gray": ButtonStyle.SECONDARY.value,
 }
 
+JOIN_BATCH_SIZE: Final = 50
+
+log = logging.getLogger(__name__)
+
 
 class CommandsMention(StrEnum):
     DROPDOWN_ADD_ROLE = "</autorole dropdown add-role:1000330305795792997>"
@@ -34,39 +45,108 @@ class CommandsMention(StrEnum):
 
 
 class AutoRoles(Extension):
+    intents = Intents.GUILDS | Intents.GUILD_MEMBERS
+
     def __init__(self, client: Asteroid):
         self.client: Asteroid = client
+        self.client.component_router.add_route("select_autorole", self.on_autorole_component)
+        self.client.component_router.add_route("button_autorole", self.on_autorole_component)
+        # Every guild has own queue and worker, so mass joins in one guild don't delay others
+        self.join_queues: dict[int, asyncio.Queue[tuple[Member, float]]] = {}
+        self._join_workers: dict[int, asyncio.Task] = {}
+
+    async def teardown(self, remove_commands: bool = True):
+        router = self.client.component_router
+        router.remove_route("select_autorole", self.on_autorole_component)
+        router.remove_route("button_autorole", self.on_autorole_component)
+        await super().teardown(remove_commands)
 
     @listener
     async def on_guild_member_add(self, member: Member):
-        guild_data = await self.client.database.get_guild(int(member.guild_id))
-        for role_id in guild_data.settings.on_join_roles:
-            await member.add_role(role_id, reason="[AUTOROLE ON_JOIN] Add role")
+        # Roles are added in background to survive mass joins
+        guild_id = int(member.guild_id)
+        if (queue := self.join_queues.get(guild_id)) is None:
+            queue = self.join_queues[guild_id] = asyncio.Queue()
+        queue.put_nowait((member, perf_counter()))
+        self._update_join_queue_depth()
+
+        if guild_id not in self._join_workers:
+            self._join_workers[guild_id] = asyncio.create_task(self._process_join_queue(guild_id))
+
+    def _update_join_queue_depth(self):
+        metrics.set_gauge(
+            "autoroles.join_queue.depth", sum(queue.qsize() for queue in self.join_queues.values())
+        )
 
-    @listener
-    async def on_component(self, ctx: ComponentContext):
-        if ctx.custom_id != "select_autorole" and not ctx.custom_id.startswith("button_autorole"):
-            return
+    async def _process_join_queue(self, guild_id: int):
+        queue = self.join_queues[guild_id]
+        try:
+            while not queue.empty():
+                batch = [queue.get_nowait()]
+                while len(batch) < JOIN_BATCH_SIZE and not queue.empty():
+                    batch.append(queue.get_nowait())
+                self._update_join_queue_depth()
+
+                try:
+                    guild_data = await self.client.database.get_guild(guild_id)
+                except Exception:
+                    metrics.increment("autoroles.join_queue.errors", len(batch))
+                    log.exception(f"Failed to get on join roles of guild {guild_id}")
+                    continue
+
+                for member, enqueued_at in batch:
+                    if on_join_roles := guild_data.settings.on_join_roles:
+                        await self._add_on_join_roles(member, on_join_roles)
+                    metrics.observe("autoroles.join_queue.lag", perf_counter() - enqueued_at)
+        finally:
+            # There is no await after the emptiness check, so no member is lost here
+            del self._join_workers[guild_id]
+            if queue.empty():
+                del self.join_queues[guild_id]
+
+    async def _add_on_join_roles(self, member: Member, on_join_roles: list[int]):
+        member_roles = {int(role_id) for role_id in member.roles or []}
+        for role_id in on_join_roles:
+            if int(role_id) in member_roles:
+                continue
+            # Role is added alone, so roles which were added after joining are kept.
+            # Background priority leaves rate limits for interactive commands
+            res = await try_run(
+                self.client.scheduler.request,
+                self.client._http.add_member_role,
+                int(member.guild_id),
+                int(member.id),
+                int(role_id),
+                reason="[AUTOROLE ON_JOIN] Add role",
+                bucket=f"member:{member.guild_id}",
+                priority=Priority.BACKGROUND,
+            )
+            if isinstance(res, Exception):
+                metrics.increment("autoroles.join_queue.errors")
+                log.warning(f"Failed to add on join role {role_id} to member {member.id}: {res!r}")
+
+    async def on_autorole_component(self, ctx: ComponentContext):
         await ctx.defer(ephemeral=True)
         roles = (
             list(map(int, ctx.data.values))
             if ctx.custom_id == "select_autorole"
             else [int(ctx.custom_id.split("|")[-1])]
         )
-        added_roles = []
-        removed_roles = []
         code = "SELECT" if ctx.custom_id == "select_autorole" else "BUTTONS"
-        for role_id in roles:
-            if role_id in ctx.author.roles:
-                await ctx.author.remove_role(
-                    role_id, ctx.guild_id, reason=f"[AUTOROLE {code}] Add role"
-                )
-                removed_roles.append(role_id)
-            else:
-                await ctx.author.add_role(
-                    role_id, ctx.guild_id, reason=f"[AUTOROLE {code}] Remove role"
-                )
-                added_roles.append(role_id)
+        member_roles = {int(role_id) for role_id in ctx.author.roles or []}
+        added_roles = [role_id for role_id in roles if role_id not in member_roles]
+        removed_roles = [role_id for role_id in roles if role_id in member_roles]
+
+        # Apply all changes with one member modify request
+        target_roles = member_roles.union(added_roles).difference(removed_roles)
+        await self.client.scheduler.request(
+            ctx.author.modify,
+            ctx.guild_id,
+            roles=list(target_roles),
+            reason=f"[AUTOROLE {code}] Update roles",
+            bucket=f"member:{ctx.guild_id}",
+            priority=Priority.INTERACTION,
+        )
 
         translate = ctx.translate
         to_send = ""
@@ -294,7 +374,12 @@ class AutoRoles(Extension):
 
         options.append(option)
 
-        await message.edit(components=components)
+        await self.client.scheduler.request(
+            message.edit,
+            components=components,
+            bucket=f"message:{autorole.channel_id}",
+            priority=Priority.INTERACTION,
+        )
 
         autorole.component = [component._json for component in components]
         await autorole.update()
@@ -339,7 +424,12 @@ class AutoRoles(Extension):
             options.append(SelectOption(label="None", value="None"))
             select.disabled = True
 
-        await message.edit(components=components)
+        await self.client.scheduler.request(
+            message.edit,
+            components=components,
+            bucket=f"message:{autorole.channel_id}",
+            priority=Priority.INTERACTION,
+        )
         autorole.component = [component._json for component in components]
         await autorole.update()
 
@@ -468,7 +558,12 @@ class AutoRoles(Extension):
         autorole.component = [_._json for _ in components]
         await autorole.update()
 
-        await message.edit(components=components)
+        await self.client.scheduler.request(
+            message.edit,
+            components=components,
+            bucket=f"message:{autorole.channel_id}",
+            priority=Priority.INTERACTION,
+        )
         embed = create_embed(ctx.translate("BUTTON_ADDED"))
         await ctx.send(embeds=embed)
 
@@ -511,7 +606,12 @@ class AutoRoles(Extension):
         else:
             raise BotException("BUTTON_NOT_FOUND")
 
-        await message.edit(components=components)
+        await self.client.scheduler.request(
+            message.edit,
+            components=components,
+            bucket=f"message:{autorole.channel_id}",
+            priority=Priority.INTERACTION,
+        )
         autorole.component = [_._json for _ in components]
         await autorole.update()
 
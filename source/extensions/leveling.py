@@ -1,10 +1,32 @@
+import asyncio
+import logging
 from collections import defaultdict
 from random import randint
-from time import time
-
-from interactions import Choice, Color, Embed, Extension, Member, Message, Permissions, Role, option
-
-from core import Asteroid, BotException, MissingPermissions, command, listener
+from time import monotonic, time
+
+from interactions import (
+    Choice,
+    Extension,
+    Intents,
+    Member,
+    Message,
+    Permissions,
+    Role,
+    VoiceState,
+    option,
+)
+
+from core import (
+    Asteroid,
+    BotException,
+    ListPageSource,
+    MissingPermissions,
+    OperatorType,
+    Paginator,
+    Priority,
+    command,
+    listener,
+)
 from core.context import CommandContext
 from core.database.models import GuildData, GuildUser, GuildUserLeveling
 from utils import try_run
@@ -12,6 +34,10 @@ from utils import try_run
 COOLDOWN = 10
 MINIMUM_EXP = 10
 MAXIMUM_EXP = 30
+LEVEL_ROLES_PER_PAGE = 20
+VOICE_FLUSH_INTERVAL = 300
+
+log = logging.getLogger(__name__)
 
 
 def get_current_timestamp() -> int:
@@ -22,10 +48,152 @@ def get_random_experience() -> int:
     return randint(MINIMUM_EXP, MAXIMUM_EXP)
 
 
+class VoiceTimeTracker:
+    """Aggregates durations of voice sessions in memory"""
+
+    __slots__ = ("sessions", "accumulated")
+
+    def __init__(self):
+        # (guild_id, user_id): start of the session
+        self.sessions: dict[tuple[int, int], float] = {}
+        # guild_id: {user_id: seconds}
+        self.accumulated: defaultdict[int, defaultdict[int, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+
+    def join(self, guild_id: int, user_id: int, now: float):
+        self.sessions.setdefault((guild_id, user_id), now)
+
+    def leave(self, guild_id: int, user_id: int, now: float):
+        if (started_at := self.sessions.pop((guild_id, user_id), None)) is not None:
+            self.accumulated[guild_id][user_id] += now - started_at
+
+    def collect(self, now: float) -> dict[int, dict[int, int]]:
+        """
+        Returns accumulated whole seconds per guild and user including active sessions.
+        Fractions of seconds are kept for the next collect.
+        """
+        for (guild_id, user_id), started_at in self.sessions.items():
+            self.accumulated[guild_id][user_id] += now - started_at
+            self.sessions[(guild_id, user_id)] = now
+
+        collected = {}
+        for guild_id, users in self.accumulated.items():
+            guild_seconds = {}
+            for user_id, seconds in users.items():
+                if (whole_seconds := int(seconds)) > 0:
+                    guild_seconds[user_id] = whole_seconds
+                    users[user_id] = seconds - whole_seconds
+            if guild_seconds:
+                collected[guild_id] = guild_seconds
+
+        return collected
+
+    def restore(self, guild_id: int, users_seconds: dict[int, int]):
+        """Returns collected seconds which weren't saved back"""
+        for user_id, seconds in users_seconds.items():
+            self.accumulated[guild_id][user_id] += seconds
+
+
 class Leveling(Extension):
+    intents = Intents.GUILD_MESSAGES | Intents.GUILD_VOICE_STATES
+
     def __init__(self, client):
         self.client: Asteroid = client
         self.cooldowns: defaultdict[tuple[str, str], int] = defaultdict(lambda: 0)
+        self.voice_time = VoiceTimeTracker()
+        # (guild_id, user_id): experience multiplied by 60 which is less than 1 experience
+        self.voice_exp_remainders: defaultdict[tuple[int, int], int] = defaultdict(int)
+        self.client.add_shutdown_callback(self.flush_voice_time)
+
+    @listener
+    async def on_start(self):
+        self.client._loop.create_task(self._flush_voice_time_loop())
+
+    @listener
+    async def on_voice_state_update(self, before: VoiceState, after: VoiceState):
+        was_connected = bool(before and before.channel_id)
+        is_connected = bool(after.channel_id)
+        if was_connected == is_connected:
+            return  # Moving between channels or muting don't change the session
+
+        if after.member is not None and after.member.user.bot:
+            return
+
+        guild_id, user_id = int(after.guild_id), int(after.user_id)
+        if is_connected:
+            self.voice_time.join(guild_id, user_id, monotonic())
+        else:
+            self.voice_time.leave(guild_id, user_id, monotonic())
+
+    async def _flush_voice_time_loop(self):
+        while True:
+            await asyncio.sleep(VOICE_FLUSH_INTERVAL)
+            await try_run(self.flush_voice_time)
+
+    async def flush_voice_time(self):
+        """Saves accumulated voice time and voice experience with one bulk write per guild"""
+        for guild_id, users_seconds in self.voice_time.collect(monotonic()).items():
+            try:
+                guild_data = await self.client.database.get_guild(guild_id)
+                increments, exp_remainders = self._get_voice_increments(guild_data, users_seconds)
+                await self.client.database.increment_users(guild_id, increments)
+            except Exception:
+                # Nothing was saved, so voice time is kept for the next flush
+                self.voice_time.restore(guild_id, users_seconds)
+                log.exception(f"Failed to save voice time of guild {guild_id}")
+                continue
+            self.voice_exp_remainders.update(exp_remainders)
+
+            # Users are already updated, so summary of the guild isn't retried to not count twice
+            await try_run(
+                self.client.database.update_guild,
+                guild_id,
+                "voice_time",
+                OperatorType.INC,
+                {str(user_id): seconds for user_id, seconds in users_seconds.items()},
+            )
+
+            # Keep cached data in sync so the next `update()` doesn't overwrite increments
+            if guild_data.voice_time is None:
+                guild_data.voice_time = {}
+            for user_id, seconds in users_seconds.items():
+                guild_data.voice_time[str(user_id)] = (
+                    guild_data.voice_time.get(str(user_id), 0) + seconds
+                )
+                if (user_data := guild_data.get_user(user_id)) is None:
+                    continue
+                # Increments are already saved, so the next `update()` shouldn't set them again
+                user_data.voice_time += seconds
+                user_data._json["voice_time"] = user_data.voice_time
+                if (exp := increments[user_id].get("leveling.xp")) and user_data.leveling:
+                    user_data.leveling.xp += exp
+                    user_data.leveling.xp_amount += exp
+                    if (leveling_json := user_data._json.get("leveling")) is not None:
+                        leveling_json["xp"] = user_data.leveling.xp
+                        leveling_json["xp_amount"] = user_data.leveling.xp_amount
+
+    def _get_voice_increments(
+        self, guild_data: GuildData, users_seconds: dict[int, int]
+    ) -> tuple[dict[int, dict[str, int]], dict[tuple[int, int], int]]:
+        """Returns increments of users and new remainders of voice experience"""
+        increments = {
+            user_id: {"voice_time_count": seconds} for user_id, seconds in users_seconds.items()
+        }
+        exp_remainders = {}
+        if not guild_data.leveling:
+            return increments, exp_remainders
+
+        # Voice factor is experience per minute. Remainders are kept for the next flush
+        for user_id, seconds in users_seconds.items():
+            key = (guild_data.guild_id, user_id)
+            exp, exp_remainders[key] = divmod(
+                seconds * guild_data.leveling.voice_factor + self.voice_exp_remainders[key], 60
+            )
+            if exp:
+                increments[user_id]["leveling.xp"] = exp
+                increments[user_id]["leveling.xp_amount"] = exp
+        return increments, exp_remainders
 
     @listener
     async def on_message_create(self, message: Message):
@@ -76,13 +244,32 @@ class Leveling(Extension):
 
         await user_data.update()
 
-    @staticmethod
     async def _add_level_role_to_user(
-        member: Member, role_id: int, user_leveling: GuildUserLeveling
+        self, member: Member, role_id: int, user_leveling: GuildUserLeveling
     ):
-        if user_leveling.role is not None:
-            await try_run(member.remove_role, user_leveling.role, guild_id=member.guild_id)
-        await try_run(member.add_role, role_id, guild_id=member.guild_id)
+        # Roles are changed one by one, so other roles changed since the member was cached stay
+        guild_id, user_id = int(member.guild_id), int(member.id)
+        if user_leveling.role is not None and user_leveling.role != role_id:
+            await try_run(
+                self.client.scheduler.request,
+                self.client._http.remove_member_role,
+                guild_id,
+                user_id,
+                user_leveling.role,
+                reason="[LEVELING] Remove previous level role",
+                bucket=f"member:{guild_id}",
+                priority=Priority.BACKGROUND,
+            )
+        await try_run(
+            self.client.scheduler.request,
+            self.client._http.add_member_role,
+            guild_id,
+            user_id,
+            role_id,
+            reason="[LEVELING] Add level role",
+            bucket=f"member:{guild_id}",
+            priority=Priority.BACKGROUND,
+        )
         user_leveling.role = role_id
 
     @command()
@@ -169,16 +356,13 @@ class Leveling(Extension):
         guild_data = await self.client.database.get_guild(ctx.guild_id)
         roles_by_level = guild_data.leveling.roles_by_level
 
-        embed = Embed(
-            title=ctx.get_translate("LEVEL_ROLES_LIST_EMBED_TITLE"),
-            description="",
-            color=Color.BLURPLE,
+        paginator = Paginator(
+            ListPageSource(list(roles_by_level.items()), LEVEL_ROLES_PER_PAGE),
+            author_id=int(ctx.author.id),
+            formatter=lambda _, item: f"**` {item[0]} `** <@&{item[1]}>",
+            title=ctx.translate("LEVEL_ROLES_LIST_EMBED_TITLE"),
         )
-
-        for level, role_id in roles_by_level.items():
-            embed.description += f"**` {level} `** <@&{role_id}>"
-
-        await ctx.send(embeds=embed)
+        await self.client.paginators.send(ctx, paginator)
 
     @level_roles.subcommand()
     async def reset_level_roles(self, ctx: CommandContext):
@@ -1,10 +1,12 @@
-from interactions import CommandContext, Extension, Guild, LibraryException  # noqa
+from interactions import CommandContext, Extension, Guild, Intents, LibraryException  # noqa
 from interactions import extension_listener as listener
 
 from core import Asteroid, BotException  # noqa isort: skip
 
 
 class Listeners(Extension):
+    intents = Intents.GUILDS
+
     def __init__(self, client: Asteroid):
         # I should add type annotation since current annotation is `interactions.Client`
         self.client: Asteroid = client
@@ -1,10 +1,23 @@
-from datetime import datetime
-
+import asyncio
+import logging
+import re
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+from itertools import count
+from time import monotonic, time
+from typing import AsyncIterator, Awaitable, Callable
+
+from bson import ObjectId
 from interactions import (
+    Button,
+    ButtonStyle,
     Color,
     Embed,
     Extension,
+    Intents,
     Member,
+    Message,
     Permissions,
     SelectMenu,
     SelectOption,
@@ -13,22 +26,370 @@ from interactions import (
 
 from core import (
     Asteroid,
-    GuildUser,
+    AsyncIteratorPageSource,
+    GuildData,
+    GuildUserWarn,
     Mention,
     MissingPermissions,
+    Paginator,
+    Priority,
     TimestampMention,
     command,
     listener,
 )
 from core.context import CommandContext, ComponentContext
+from core.metrics import metrics
+from utils import try_run
+
+log = logging.getLogger(__name__)
 
 # TODO:
 #   Send embed messages
 
+WARNS_PER_PAGE = 5
+# Seconds between updates of the progress of long actions
+PROGRESS_INTERVAL = 2
+MESSAGES_PAGE_SIZE = 100
+BULK_DELETE_LIMIT = 100
+# Discord bulk deletes only messages younger than 2 weeks. Margin covers the time of purging
+BULK_DELETE_MAX_AGE = 14 * 24 * 60 * 60 - 10 * 60
+DISCORD_EPOCH = 1420070400000
+# Member is a spammer if sends `SPAM_MESSAGES_LIMIT` messages
+# or `SPAM_DUPLICATES_LIMIT` same messages within `SPAM_WINDOW` seconds
+SPAM_WINDOW = 5.0
+SPAM_MESSAGES_LIMIT = 7
+SPAM_DUPLICATES_LIMIT = 3
+SPAM_PRUNE_INTERVAL = 60
+MEMBERS_PAGE_SIZE = 1000
+MASS_ACTION_CONCURRENCY = 5
+MASS_ACTION_MAX_TARGETS = 1000
+user_id_pattern = re.compile(r"\d{17,20}")
+
+
+def get_snowflake_timestamp(snowflake: int | str) -> float:
+    return ((int(snowflake) >> 22) + DISCORD_EPOCH) / 1000
+
+
+class SpamDetector:
+    """
+    Detects flood and repeated messages with a sliding window per member.
+    Window keeps only timestamps and hashes of contents of the last messages.
+    """
+
+    __slots__ = ("window", "messages_limit", "duplicates_limit", "histories")
+
+    def __init__(
+        self,
+        window: float = SPAM_WINDOW,
+        messages_limit: int = SPAM_MESSAGES_LIMIT,
+        duplicates_limit: int = SPAM_DUPLICATES_LIMIT,
+    ):
+        self.window: float = window
+        self.messages_limit: int = messages_limit
+        self.duplicates_limit: int = duplicates_limit
+        # (guild_id, user_id): (sent at, content hash) of the last messages
+        self.histories: dict[tuple[int, int], deque[tuple[float, int]]] = {}
+
+    def check(self, guild_id: int, user_id: int, content: str, now: float) -> bool:
+        """Adds the message to the window of the member and returns whether the member spams"""
+        key = (guild_id, user_id)
+        if (history := self.histories.get(key)) is None:
+            history = self.histories[key] = deque(maxlen=self.messages_limit)
+
+        expired_at = now - self.window
+        while history and history[0][0] <= expired_at:
+            history.popleft()
+
+        content_hash = hash(content) if content else 0
+        history.append((now, content_hash))
+        if len(history) == self.messages_limit:
+            return True
+        if not content_hash or len(history) < self.duplicates_limit:
+            return False
+        return sum(item[1] == content_hash for item in history) >= self.duplicates_limit
+
+    def reset(self, guild_id: int, user_id: int):
+        self.histories.pop((guild_id, user_id), None)
+
+    def prune(self, now: float):
+        """Removes windows of members who didn't send messages within the window"""
+        expired_at = now - self.window
+        for key in [key for key, history in self.histories.items() if history[-1][0] <= expired_at]:
+            del self.histories[key]
+
+
+class MassAction:
+    """
+    Applies an action to many members with bounded concurrency.
+    Requests are sent through the scheduler, so they respect rate limits of the member bucket.
+    """
+
+    def __init__(
+        self,
+        client: Asteroid,
+        guild_id: int,
+        user_ids: list[int],
+        action: Callable[..., Awaitable],
+        *,
+        reason: str | None = None,
+        concurrency: int = MASS_ACTION_CONCURRENCY,
+    ):
+        self.client: Asteroid = client
+        self.guild_id: int = guild_id
+        self.user_ids: list[int] = user_ids
+        self.action = action
+        self.reason: str | None = reason
+        self.concurrency: int = concurrency
+        self.succeeded: list[int] = []
+        self.failed: list[int] = []
+
+    @property
+    def processed(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+    async def run(self, on_progress: Callable[[], Awaitable] = None):
+        """Applies the action to all members and calls `on_progress` after every member"""
+        queue = deque(self.user_ids)
+
+        async def worker():
+            while queue:
+                user_id = queue.popleft()
+                result = await try_run(
+                    self.client.scheduler.request,
+                    self.action,
+                    self.guild_id,
+                    user_id,
+                    reason=self.reason,
+                    bucket=f"member:{self.guild_id}",
+                )
+                (self.failed if isinstance(result, Exception) else self.succeeded).append(user_id)
+                if on_progress is not None:
+                    await on_progress()
+
+        with metrics.timer("moderation.mass_action"):
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(queue)))))
+        metrics.increment("moderation.mass_action.succeeded", len(self.succeeded))
+        metrics.increment("moderation.mass_action.failed", len(self.failed))
+
+
+class ChannelPurge:
+    """
+    Deletes messages of the channel from the newest one.
+    History is loaded page by page, messages younger than 2 weeks are deleted
+    by batches with bulk delete and older messages are deleted one by one.
+    """
+
+    _ids = count(1)
+
+    def __init__(
+        self,
+        client: Asteroid,
+        channel_id: int,
+        amount: int,
+        *,
+        check: Callable[[dict], bool] | None = None,
+        bulk: bool = True,
+    ):
+        self.id: int = next(self._ids)
+        self.client: Asteroid = client
+        self.channel_id: int = channel_id
+        self.amount: int = amount
+        self.check = check
+        self.bulk: bool = bulk
+        self.deleted: int = 0
+        # Messages which deletion requests failed
+        self.failed: int = 0
+        # Whether history couldn't be loaded, so not all messages were found
+        self.interrupted: bool = False
+        self.cancelled: bool = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    async def _iter_history(self) -> AsyncIterator[dict]:
+        before = None
+        while not self.cancelled:
+            messages: list[dict] | Exception = await try_run(
+                self.client.scheduler.request,
+                self.client._http.get_channel_messages,
+                self.channel_id,
+                limit=MESSAGES_PAGE_SIZE,
+                before=before,
+                bucket=f"channel:{self.channel_id}",
+            )
+            if isinstance(messages, Exception):
+                log.warning(f"Failed to load messages of channel {self.channel_id}: {messages!r}")
+                self.interrupted = True
+                return
+            for message in messages:
+                yield message
+            if len(messages) < MESSAGES_PAGE_SIZE:
+                return
+            before = int(messages[-1]["id"])
+
+    async def run(self, on_progress: Callable[[], Awaitable] = None):
+        """Deletes messages and calls `on_progress` after every deletion request"""
+        bulk_ids: list[int] = []
+        single_ids: list[int] = []
+        found = 0
+        min_bulk_timestamp = time() - BULK_DELETE_MAX_AGE
+
+        async for message in self._iter_history():
+            if self.check is not None and not self.check(message):
+                continue
+            message_id = int(message["id"])
+            if self.bulk and get_snowflake_timestamp(message_id) > min_bulk_timestamp:
+                bulk_ids.append(message_id)
+            else:
+                single_ids.append(message_id)
+
+            if len(bulk_ids) == BULK_DELETE_LIMIT:
+                await self._bulk_delete(bulk_ids)
+                bulk_ids = []
+                if on_progress is not None:
+                    await on_progress()
+
+            found += 1
+            if found >= self.amount:
+                break
+
+        if len(bulk_ids) > 1:
+            await self._bulk_delete(bulk_ids)
+        else:
+            # Bulk delete requires at least 2 messages
+            single_ids = bulk_ids + single_ids
+
+        for message_id in single_ids:
+            if self.cancelled:
+                return
+            if on_progress is not None:
+                await on_progress()
+            await self._delete(message_id)
+
+    async def _bulk_delete(self, message_ids: list[int]):
+        if self.cancelled:
+            return
+        with metrics.timer("moderation.purge.bulk_delete"):
+            result = await try_run(
+                self.client.scheduler.request,
+                self.client._http.delete_messages,
+                self.channel_id,
+                message_ids,
+                bucket=f"channel:{self.channel_id}",
+            )
+        if isinstance(result, Exception):
+            log.warning(f"Failed to bulk delete messages of channel {self.channel_id}: {result!r}")
+            self.failed += len(message_ids)
+            metrics.increment("moderation.purge.failed", len(message_ids))
+            return
+        self.deleted += len(message_ids)
+        metrics.increment("moderation.purge.bulk_deleted", len(message_ids))
+
+    async def _delete(self, message_id: int):
+        # Single deletes are paced by the scheduler to not exhaust limits for other requests
+        result = await try_run(
+            self.client.scheduler.request,
+            self.client._http.delete_message,
+            self.channel_id,
+            message_id,
+            bucket=f"message:{self.channel_id}",
+            priority=Priority.BACKGROUND,
+        )
+        if isinstance(result, Exception):
+            self.failed += 1
+            metrics.increment("moderation.purge.failed")
+            return
+        self.deleted += 1
+        metrics.increment("moderation.purge.single_deleted")
+
 
 class Moderation(Extension):
+    intents = Intents.GUILD_MESSAGES | Intents.GUILD_MESSAGE_CONTENT | Intents.GUILD_MEMBERS
+
     def __init__(self, client) -> None:
         self.client: Asteroid = client
+        self.spam_detector = SpamDetector()
+        self.client.component_router.add_route(
+            "select_remove_user_warn", self.select_remove_user_warns
+        )
+        self.client.component_router.add_route("purge", self.cancel_purge)
+        self.purges: dict[int, ChannelPurge] = {}
+
+    async def teardown(self, remove_commands: bool = True):
+        router = self.client.component_router
+        router.remove_route("select_remove_user_warn", self.select_remove_user_warns)
+        router.remove_route("purge", self.cancel_purge)
+        await super().teardown(remove_commands)
+
+    @listener
+    async def on_start(self):
+        self.client._loop.create_task(self._prune_spam_detector_loop())
+        await self.client.database.create_indexes()
+
+    async def _prune_spam_detector_loop(self):
+        while True:
+            await asyncio.sleep(SPAM_PRUNE_INTERVAL)
+            self.spam_detector.prune(monotonic())
+
+    @listener
+    async def on_message_create(self, message: Message):
+        if message.author.bot or not message.guild_id:
+            return
+        # Guild data is cached, so it doesn't make requests in common case
+        guild_data = await self.client.database.get_guild(message.guild_id)
+        if not guild_data.settings.spam_detection:
+            return
+
+        guild_id, user_id = int(message.guild_id), int(message.author.id)
+        if not self.spam_detector.check(guild_id, user_id, message.content, monotonic()):
+            return
+
+        self.spam_detector.reset(guild_id, user_id)
+        metrics.increment("moderation.spam.detected")
+        await try_run(
+            self.client.scheduler.request,
+            self.client._http.delete_message,
+            int(message.channel_id),
+            int(message.id),
+            bucket=f"message:{message.channel_id}",
+            priority=Priority.BACKGROUND,
+        )
+        if not guild_data.settings.warns_limit:
+            return
+
+        warns_count = await self._add_warn(
+            guild_data, user_id, author_id=int(self.client.me.id), reason="[AUTO-MOD] Spam"
+        )
+        if warns_count >= guild_data.settings.warns_limit:
+            result = await try_run(
+                self.client.scheduler.request,
+                self.client._http.create_guild_ban,
+                guild_id,
+                user_id,
+                reason="[AUTO] Exceeded limit of warns",
+                bucket=f"member:{guild_id}",
+                priority=Priority.BACKGROUND,
+            )
+            if isinstance(result, Exception):
+                # Bot can miss the permission or be lower than the member
+                log.warning(f"Failed to ban spammer {user_id} of guild {guild_id}: {result!r}")
+                metrics.increment("moderation.spam.ban_failed")
+                return
+            metrics.increment("moderation.spam.banned")
+
+    async def _add_warn(
+        self, guild_data: GuildData, user_id: int, *, author_id: int, reason: str | None
+    ) -> int:
+        """Adds a warn to the member and returns the count of member warns"""
+        warned_at = datetime.utcnow()
+        return await self.client.database.add_warn(
+            guild_data.guild_id,
+            user_id,
+            author_id=author_id,
+            warned_at=warned_at,
+            reason=reason,
+            expires_at=guild_data.settings.get_warn_expiry(warned_at),
+        )
 
     @command()
     async def mod(self, ctx: CommandContext):
@@ -40,14 +401,32 @@ class Moderation(Extension):
         min_value=0,
         max_value=10,  # 10 is fine?
     )
-    async def configure(self, ctx: CommandContext, warns_to_ban: int):
+    @option(
+        "The amount of days after which warns expire. Set to 0 to keep warns forever",
+        min_value=0,
+        max_value=365,
+    )
+    @option("Whether to warn members for spam automatically")
+    async def configure(
+        self,
+        ctx: CommandContext,
+        warns_to_ban: int,
+        warns_expire_days: int = None,
+        spam_detection: bool = None,
+    ):
         """Configures warns and moderator role"""
         if not ctx.has_permissions(Permissions.MODERATE_MEMBERS):
             raise MissingPermissions(Permissions.MODERATE_MEMBERS)
 
         guild_data = await self.client.database.get_guild(ctx.guild_id)
-        guild_data.settings.warns_limit = warns_to_ban
-        await guild_data.settings.update()
+        settings = guild_data.settings
+        settings.warns_limit = warns_to_ban
+        if warns_expire_days is not None and warns_expire_days != (settings.warns_expire_days or 0):
+            settings.warns_expire_days = warns_expire_days
+            await self.client.database.set_warns_expiry(ctx.guild_id, warns_expire_days)
+        if spam_detection is not None:
+            settings.spam_detection = spam_detection
+        await settings.update()
 
         translate = ctx.translate("SUCCESSFULLY_CONFIGURED")
         await ctx.send(translate)
@@ -94,6 +473,230 @@ class Moderation(Extension):
 
         await ctx.send(translate("MEMBER_KICKED", member=member), ephemeral=True)
 
+    @mod_member.subcommand()
+    @option("Mentions or ids of members to ban")
+    @option("Bans members who joined within this amount of minutes", min_value=1)
+    @option("Bans members which names match the pattern like `spammer*`")
+    @option("The reason of banning")
+    async def mass_ban(
+        self,
+        ctx: CommandContext,
+        members: str = None,
+        joined_within: int = None,
+        name_pattern: str = None,
+        reason: str = None,
+    ):
+        """Bans many members of the server"""
+        if not await ctx.has_permissions(Permissions.BAN_MEMBERS):
+            raise MissingPermissions(Permissions.BAN_MEMBERS)
+
+        await self._run_mass_action(
+            ctx,
+            "ban",
+            self.client._http.create_guild_ban,
+            members=members,
+            joined_within=joined_within,
+            name_pattern=name_pattern,
+            reason=reason,
+        )
+
+    @mod_member.subcommand()
+    @option("Mentions or ids of members to kick")
+    @option("Kicks members who joined within this amount of minutes", min_value=1)
+    @option("Kicks members which names match the pattern like `spammer*`")
+    @option("The reason of kicking")
+    async def mass_kick(
+        self,
+        ctx: CommandContext,
+        members: str = None,
+        joined_within: int = None,
+        name_pattern: str = None,
+        reason: str = None,
+    ):
+        """Kicks many members of the server"""
+        if not await ctx.has_permissions(Permissions.KICK_MEMBERS):
+            raise MissingPermissions(Permissions.KICK_MEMBERS)
+
+        await self._run_mass_action(
+            ctx,
+            "kick",
+            self.client._http.remove_guild_member,
+            members=members,
+            joined_within=joined_within,
+            name_pattern=name_pattern,
+            reason=reason,
+        )
+
+    async def _run_mass_action(
+        self,
+        ctx: CommandContext,
+        action_name: str,
+        action: Callable[..., Awaitable],
+        *,
+        members: str | None,
+        joined_within: int | None,
+        name_pattern: str | None,
+        reason: str | None,
+    ):
+        if name_pattern and not name_pattern.strip("*? "):
+            # Pattern like `*` matches every member
+            return await ctx.send(ctx.translate("MASS_ACTION_PATTERN_TOO_BROAD"), ephemeral=True)
+
+        await ctx.defer(ephemeral=True)
+
+        targets = await self._get_mass_action_targets(
+            int(ctx.guild_id), members, joined_within, name_pattern
+        )
+        user_ids = sorted(await self._get_moderatable_ids(ctx, targets))
+        if not user_ids:
+            return await ctx.send(ctx.translate("MASS_ACTION_NO_TARGETS"), ephemeral=True)
+        skipped = len(targets) - len(user_ids)
+        over_limit = max(0, len(user_ids) - MASS_ACTION_MAX_TARGETS)
+
+        mass_action = MassAction(
+            self.client,
+            int(ctx.guild_id),
+            user_ids[:MASS_ACTION_MAX_TARGETS],
+            action,
+            reason=reason,
+        )
+        total = len(mass_action.user_ids)
+        last_progress_at = monotonic()
+
+        async def report_progress():
+            nonlocal last_progress_at
+            if monotonic() - last_progress_at < PROGRESS_INTERVAL:
+                return
+            last_progress_at = monotonic()
+            await try_run(
+                ctx.edit,
+                ctx.translate("MASS_ACTION_IN_PROGRESS", amount=mass_action.processed, total=total),
+            )
+
+        await mass_action.run(report_progress)
+        await self.client.database.add_audit_entry(
+            ctx.guild_id,
+            action=action_name,
+            moderator_id=int(ctx.author.id),
+            user_ids=mass_action.succeeded,
+            failed_user_ids=mass_action.failed,
+            reason=reason,
+        )
+
+        key = "MEMBERS_BANNED" if action_name == "ban" else "MEMBERS_KICKED"
+        content = ctx.translate(key, amount=len(mass_action.succeeded), total=total)
+        if skipped:
+            content += "\n" + ctx.translate("MASS_ACTION_SKIPPED", amount=skipped)
+        if over_limit:
+            content += "\n" + ctx.translate(
+                "MASS_ACTION_OVER_LIMIT", amount=over_limit, limit=MASS_ACTION_MAX_TARGETS
+            )
+        await self._send_final_status(ctx, content)
+
+    async def _get_mass_action_targets(
+        self,
+        guild_id: int,
+        members: str | None,
+        joined_within: int | None,
+        name_pattern: str | None,
+    ) -> dict[int, dict | None]:
+        """
+        Returns data of selected members and members which match all passed filters by their ids.
+        Data is None for selected users which aren't members of the guild.
+        """
+        user_ids = {int(user_id) for user_id in user_id_pattern.findall(members or "")}
+        selected = await asyncio.gather(
+            *(
+                try_run(
+                    self.client.scheduler.request,
+                    self.client._http.get_member,
+                    guild_id,
+                    user_id,
+                    bucket=f"guild_members:{guild_id}",
+                )
+                for user_id in user_ids
+            )
+        )
+        targets = {
+            user_id: member if isinstance(member, dict) else None
+            for user_id, member in zip(user_ids, selected)
+        }
+        if joined_within is None and not name_pattern:
+            return targets
+
+        joined_after = datetime.now(timezone.utc) - timedelta(minutes=joined_within or 0)
+        pattern = name_pattern.lower() if name_pattern else None
+
+        def check(member: dict) -> bool:
+            if joined_within is not None:
+                if datetime.fromisoformat(member["joined_at"]) < joined_after:
+                    return False
+            if pattern is not None:
+                names = (member["user"]["username"], member.get("nick") or "")
+                if not any(fnmatchcase(name.lower(), pattern) for name in names):
+                    return False
+            return True
+
+        # Members are listed by ids, so all pages are checked
+        after = 0
+        while True:
+            page: list[dict] = await self.client.scheduler.request(
+                self.client._http.get_list_of_members,
+                guild_id,
+                limit=MEMBERS_PAGE_SIZE,
+                after=after,
+                bucket=f"guild_members:{guild_id}",
+            )
+            targets.update((int(member["user"]["id"]), member) for member in page if check(member))
+            if len(page) < MEMBERS_PAGE_SIZE:
+                return targets
+            after = int(page[-1]["user"]["id"])
+
+    async def _get_moderatable_ids(
+        self, ctx: CommandContext, targets: dict[int, dict | None]
+    ) -> set[int]:
+        """
+        Returns ids of targets which the moderator and the bot can moderate.
+        Bots, the moderator, the owner and members with higher or same top role are skipped.
+        """
+        guild_id = int(ctx.guild_id)
+        guild = await self.client.get_guild(guild_id)
+        roles: list[dict] = await self.client.scheduler.request(
+            self.client._http.get_all_roles, guild_id, bucket=f"guild_roles:{guild_id}"
+        )
+        positions = {int(role["id"]): role["position"] for role in roles}
+
+        def get_top_position(role_ids: list) -> int:
+            return max((positions.get(int(role_id), 0) for role_id in role_ids or []), default=0)
+
+        author_id, owner_id = int(ctx.author.id), int(guild.owner_id)
+        bot = await self.client.get_member(guild_id, self.client.me.id)
+        max_position = get_top_position(bot.roles)
+        if author_id != owner_id:
+            max_position = min(max_position, get_top_position(ctx.author.roles))
+
+        protected = {author_id, owner_id, int(self.client.me.id)}
+        return {
+            user_id
+            for user_id, member in targets.items()
+            if member is not None
+            and user_id not in protected
+            and not member["user"].get("bot")
+            and get_top_position(member.get("roles")) < max_position
+        }
+
+    async def _send_final_status(self, ctx: CommandContext, content: str):
+        result = await try_run(ctx.edit, content, components=[])
+        if isinstance(result, Exception):
+            # Interaction token expires in 15 minutes, so long actions report to the channel
+            await try_run(
+                self.client.scheduler.request,
+                self.client._http.create_message,
+                {"content": content},
+                int(ctx.channel_id),
+                bucket=f"channel:{ctx.channel_id}",
+            )
+
     @mod_member.subcommand()
     @option("The member to warn")
     @option("The reason of warning")
@@ -115,139 +718,190 @@ class Moderation(Extension):
         if member.id == ctx.author.id:
             return await ctx.send(translate("CANNOT_WARN_YOURSELF"), ephemeral=True)
 
-        user_data = guild_data.get_user(int(member.id))
-
-        if user_data is None:
-            user_data = await guild_data.add_user(int(member.id))
-
-        user_data.add_warn(author_id=int(ctx.author.id), warned_at=datetime.utcnow(), reason=reason)
-        await user_data.update()
+        warns_count = await self._add_warn(
+            guild_data, int(member.id), author_id=int(ctx.author.id), reason=reason
+        )
 
-        if len(user_data.warns) >= guild_data.settings.warns_limit:
+        if warns_count >= guild_data.settings.warns_limit:
             await member.ban(ctx.guild_id, reason="[AUTO] Exceeded limit of warns")
             return await ctx.send(translate("MEMBER_BANNED", member=member))
 
         await ctx.send(
-            translate("MEMBER_WARNED", member=member, amount=len(user_data.warns)), ephemeral=True
+            translate("MEMBER_WARNED", member=member, amount=warns_count), ephemeral=True
         )
 
     @mod_member.subcommand()
     @option("The member to view warns")
     async def warns(self, ctx: CommandContext, member: Member):
         """List of member warns"""
-        guild_data = await self.client.database.get_guild(ctx.guild_id)
-        user_data = guild_data.get_user(int(member.id))
-        translate = ctx.translate
-
-        if user_data is None or not user_data.warns:
-            return await ctx.send(translate("NO_WARNS"), ephemeral=True)
-
-        embed, components = await self._render_user_warns(ctx, member, user_data)
-        await ctx.send(embeds=embed, components=components)
-
-    @staticmethod
-    async def _render_user_warns(
-        ctx: CommandContext | ComponentContext,
-        member: Member,
-        user_data: GuildUser,
-    ):
-        embed = Embed(title=ctx.translate("WARNS_LIST"), description="", color=Color.BLURPLE)
-        embed.set_thumbnail(url=member.user.avatar_url)
-        embed.set_author(
-            name=f"{member.user.username}#{member.user.discriminator}",
-            icon_url=member.user.avatar_url,
-        )
+        paginator = self._get_user_warns_paginator(ctx, member)
+        items, _ = await paginator.source.get_page(0)
+        if not items:
+            return await ctx.send(ctx.translate("NO_WARNS"), ephemeral=True)
+
+        await self.client.paginators.send(ctx, paginator)
+
+    def _get_user_warns_paginator(
+        self, ctx: CommandContext | ComponentContext, member: Member
+    ) -> Paginator[GuildUserWarn]:
+        def create_embed() -> Embed:
+            embed = Embed(title=ctx.translate("WARNS_LIST"), color=Color.BLURPLE)
+            embed.set_thumbnail(url=member.user.avatar_url)
+            embed.set_author(
+                name=f"{member.user.username}#{member.user.discriminator}",
+                icon_url=member.user.avatar_url,
+            )
+            return embed
 
-        for count, warn in enumerate(user_data.warns, start=1):
-            embed.description += (
+        def format_warn(count: int, warn: GuildUserWarn) -> str:
+            return (
                 f"**` {count} `**\n"
                 f"> **{ctx.translate('AUTHOR')}:** {Mention.USER.format(id=warn.author_id)}\n"
                 f"> **{ctx.translate('WARNED_AT')}:** {TimestampMention.LONG_DATE.format(int(warn.warned_at.timestamp()))}\n"
+                + (
+                    f"> **{ctx.translate('EXPIRES_AT')}:** {TimestampMention.LONG_DATE.format(int(warn.expires_at.timestamp()))}\n"
+                    if warn.expires_at
+                    else ""
+                )
                 + (f"> **{ctx.translate('REASON')}:** {warn.reason}" if warn.reason else "")
                 + "\n"
             )
 
-        components = []
-        if await ctx.has_permissions(Permissions.MODERATE_MEMBERS):
-            components = [
+        async def create_components(
+            _ctx: CommandContext | ComponentContext, warns: list[tuple[int, GuildUserWarn]]
+        ) -> list[SelectMenu]:
+            if not await _ctx.has_permissions(Permissions.MODERATE_MEMBERS):
+                return []
+            # Only warns of the current page can be selected
+            return [
                 SelectMenu(
                     placeholder=ctx.translate("SELECT_REMOVE_WARNS"),
                     custom_id=f"select_remove_user_warn|{member.id}",
                     options=[
-                        SelectOption(label=i + 1, value=i) for i in range(len(user_data.warns))
+                        SelectOption(label=count, value=str(warn.id)) for count, warn in warns
                     ],
-                    max_values=len(user_data.warns),
+                    max_values=len(warns),
                 )
             ]
 
-        return embed, components
+        return Paginator(
+            AsyncIteratorPageSource(
+                self.client.database.get_warns(ctx.guild_id, member.id), WARNS_PER_PAGE
+            ),
+            author_id=int(ctx.author.id),
+            formatter=format_warn,
+            embed_factory=create_embed,
+            components_factory=create_components,
+        )
 
-    @listener(name="on_component")
     async def select_remove_user_warns(self, ctx: ComponentContext):
-        if not ctx.custom_id.startswith("select_remove_user_warn"):
-            return
         if not await ctx.has_permissions(Permissions.MODERATE_MEMBERS):
             raise MissingPermissions(Permissions.MODERATE_MEMBERS)
 
         await ctx.defer(ephemeral=True)
 
         member_id = int(ctx.custom_id.split("|")[1])
-        warn_indexes: list[int] = list(map(int, ctx.data.values))
-
-        guild_data = await self.client.database.get_guild(ctx.guild_id)
-        user_data = guild_data.get_user(member_id)
+        warn_ids: list[ObjectId] = [ObjectId(value) for value in ctx.data.values]
         translate = ctx.translate
 
-        # Does it work?
-        warns = {i: warn for i, warn in enumerate(user_data.warns)}
-
-        for index in warn_indexes:
-            user_data.warns.remove(warns[index])
-
-        await user_data.update()
+        removed_count = await self.client.database.remove_warns(ctx.guild_id, member_id, warn_ids)
 
-        if user_data.warns:
+        if await self.client.database.count_warns(ctx.guild_id, member_id):
             member = await self.client.get_member(ctx.guild_id, member_id)
-            embed, components = await self._render_user_warns(ctx, member, user_data)
-            await ctx.message.edit(embeds=embed, components=components)
+            paginator = self.client.paginators.add(self._get_user_warns_paginator(ctx, member))
+            embed, components = await paginator.render(ctx)
+            await self.client.scheduler.request(
+                ctx.message.edit,
+                embeds=embed,
+                components=components,
+                bucket=f"message:{ctx.channel_id}",
+                priority=Priority.INTERACTION,
+            )
         else:
-            await ctx.message.delete("[AUTO-MOD] User don't have warns.")
+            await self.client.scheduler.request(
+                ctx.message.delete,
+                "[AUTO-MOD] User don't have warns.",
+                bucket=f"message:{ctx.channel_id}",
+                priority=Priority.INTERACTION,
+            )
 
-        if len(warn_indexes) == 1:
+        if removed_count == 1:
             await ctx.send(translate("WARN_REMOVED"))
         else:
             await ctx.send(translate("WARNS_REMOVED"))
 
-    # TODO: Restore after fix for Channel.purge
-    # @mod.group(name="channel")
-    # async def mod_channel(self, ctx: CommandContext):
-    #     """Group command for channels"""
-
-    # @mod_channel.subcommand()
-    # @option("The amount of messages to delete", min_value=1, max_value=1000)
-    # @option("The member to delete messages for")
-    # @option("Whether to bulk delete the messages or to delete every message separately")
-    # async def purge(
-    #     self, ctx: CommandContext, amount: int, member: Member = None, bulk: bool = True
-    # ):
-    #     """Deletes the messages in the current channel"""
-    #     if not await ctx.has_permissions(Permissions.MANAGE_CHANNELS):
-    #         raise MissingPermissions(Permissions.MANAGE_CHANNELS)
-    #
-    #     def check(message: Message):
-    #         return message.author.id == member.id
-    #
-    #     await ctx.defer(ephemeral=True)
-    #
-    #     channel = ctx.channel
-    #     if channel is MISSING:
-    #         channel = await self.client.get_channel(ctx.channel_id)
-    #
-    #     _check = check if member is not None else MISSING
-    #
-    #     messages = await channel.purge(amount, check=_check, bulk=bulk)
-    #
-    #     await ctx.send(ctx.translate("MESSAGES_REMOVED", amount=len(messages)))
+    @mod.group(name="channel")
+    async def mod_channel(self, ctx: CommandContext):
+        """Group command for channels"""
+
+    @mod_channel.subcommand()
+    @option("The amount of messages to delete", min_value=1, max_value=1000)
+    @option("The member to delete messages for")
+    @option("Whether to bulk delete the messages or to delete every message separately")
+    async def purge(
+        self, ctx: CommandContext, amount: int, member: Member = None, bulk: bool = True
+    ):
+        """Deletes the messages in the current channel"""
+        if not await ctx.has_permissions(Permissions.MANAGE_MESSAGES):
+            raise MissingPermissions(Permissions.MANAGE_MESSAGES)
+
+        await ctx.defer(ephemeral=True)
+
+        check = None
+        if member is not None:
+            member_id = str(member.id)
+
+            def check(message: dict) -> bool:
+                return message["author"]["id"] == member_id
+
+        purge = ChannelPurge(self.client, int(ctx.channel_id), amount, check=check, bulk=bulk)
+        self.purges[purge.id] = purge
+        last_progress_at = monotonic()
+
+        async def report_progress():
+            nonlocal last_progress_at
+            if monotonic() - last_progress_at < PROGRESS_INTERVAL:
+                return
+            last_progress_at = monotonic()
+            await try_run(
+                ctx.edit,
+                ctx.translate("PURGE_IN_PROGRESS", amount=purge.deleted, total=amount),
+                components=[
+                    Button(
+                        label=ctx.translate("CANCEL"),
+                        custom_id=f"purge|{purge.id}",
+                        style=ButtonStyle.DANGER,
+                    )
+                ],
+            )
+
+        try:
+            await purge.run(report_progress)
+        finally:
+            del self.purges[purge.id]
+
+        if purge.cancelled:
+            key = "PURGE_CANCELLED"
+        elif purge.interrupted:
+            key = "PURGE_INTERRUPTED"
+        else:
+            key = "MESSAGES_REMOVED"
+        content = ctx.translate(key, amount=purge.deleted)
+        if purge.failed:
+            content += "\n" + ctx.translate("PURGE_FAILED", amount=purge.failed)
+
+        await self._send_final_status(ctx, content)
+
+    async def cancel_purge(self, ctx: ComponentContext):
+        if not await ctx.has_permissions(Permissions.MANAGE_MESSAGES):
+            raise MissingPermissions(Permissions.MANAGE_MESSAGES)
+
+        purge = self.purges.get(int(ctx.custom_id.split("|")[1]))
+        if purge is None:
+            return await ctx.send(ctx.translate("PURGE_NOT_RUNNING"), ephemeral=True)
+
+        purge.cancel()
+        await ctx.defer(edit_origin=True)
 
 
 def setup(client: Asteroid):
@@ -1,15 +1,33 @@
+from collections import Counter, defaultdict
 from datetime import datetime
+from typing import Iterable
 
 from interactions import Choice, EmbedField, Extension, Modal, TextInput, TextStyleType
 from interactions import extension_modal as modal
 from interactions import option
 from rapidfuzz import fuzz, process
 
-from core import Asteroid, BotException, Mention, TimestampMention, command, listener
+from core import (
+    Asteroid,
+    BotException,
+    Debouncer,
+    ListPageSource,
+    Mention,
+    Paginator,
+    TimestampMention,
+    command,
+    listener,
+)
 from core.context import CommandContext
-from core.database.models import GuildTag
+from core.database.models import GuildData
+from core.metrics import metrics
 from utils import create_embed
 
+AUTOCOMPLETE_LIMIT = 25
+AUTOCOMPLETE_SCORE_CUTOFF = 75
+TAGS_PER_PAGE = 20
+TAG_USES_WRITE_DELAY = 60
+
 
 def build_modal(
     ctx: CommandContext,
@@ -58,30 +76,88 @@ def build_modal(
     )
 
 
+class TagIndex:
+    """
+    Search index of tag names of a guild.
+
+    Names are normalized once when tags are added or renamed instead of on every keystroke.
+    All names are scored by rapidfuzz, which takes most of the search time: a prefilter
+    which doesn't lose partial ratio matches keeps almost all names, so it isn't used.
+    """
+
+    __slots__ = ("names",)
+
+    def __init__(self, names: Iterable[str] = ()):
+        # original name: normalized name
+        self.names: dict[str, str] = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return name.lower().strip()
+
+    def add(self, name: str):
+        self.names[name] = self.normalize(name)
+
+    def remove(self, name: str):
+        self.names.pop(name, None)
+
+    def rename(self, old_name: str, new_name: str):
+        self.remove(old_name)
+        self.add(new_name)
+
+    def search(self, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[str]:
+        query = self.normalize(query)
+        if not query:
+            return list(self.names)[:limit]
+
+        options = process.extract(
+            query,
+            self.names,
+            scorer=fuzz.partial_ratio,
+            processor=None,
+            limit=limit,
+            score_cutoff=AUTOCOMPLETE_SCORE_CUTOFF,
+        )
+        return [name for _, _, name in options]
+
+
 class Tags(Extension):
     def __init__(self, client) -> None:
         self.client: Asteroid = client
+        self.indexes: dict[int, TagIndex] = {}
+        # guild_id: {tag name: views since the last write}
+        self.tag_uses: defaultdict[int, Counter[str]] = defaultdict(Counter)
+        self.tag_uses_writer: Debouncer[int] = Debouncer(
+            TAG_USES_WRITE_DELAY, self._write_tag_uses, name="tag_uses"
+        )
+        self.client.add_shutdown_callback(self.tag_uses_writer.flush)
 
     @command()
     async def tag(self, ctx: CommandContext):
         """Command for tags"""
 
-    @staticmethod
-    def _process_tag_name(tag: GuildTag):
-        return tag.name.lower().strip()
+    async def _write_tag_uses(self, guild_id: int):
+        if uses := self.tag_uses.pop(guild_id, None):
+            await self.client.database.increment_tags_uses(guild_id, uses)
+
+    def get_index(self, guild_data: GuildData) -> TagIndex:
+        if (index := self.indexes.get(guild_data.guild_id)) is None:
+            index = self.indexes[guild_data.guild_id] = TagIndex(
+                tag.name for tag in guild_data.tags or ()
+            )
+        return index
 
     @tag.autocomplete("name")
     async def tag_autocomplete(self, ctx: CommandContext, user_input: str):
         guild_data = await self.client.database.get_guild(int(ctx.guild_id))
-        options = process.extract(
-            user_input.lower(),
-            guild_data.tags,
-            scorer=fuzz.partial_ratio,
-            processor=self._process_tag_name,
-            limit=25,
-            score_cutoff=75,
-        )
-        choices = [Choice(name=tag.name, value=tag.name) for tag, _, _ in options]
+        with metrics.timer("tags.autocomplete"):
+            names = self.get_index(guild_data).search(user_input)
+        choices = [Choice(name=name, value=name) for name in names]
         await ctx.populate(choices)
 
     @tag.subcommand(name="view")
@@ -90,16 +166,16 @@ class Tags(Extension):
         """View a tag"""
         guild_data = await self.client.database.get_guild(int(ctx.guild_id))
         tag = guild_data.get_tag(name)
-        if tag is None:
+        if tag is None or (body := await tag.get_body()) is None:
             raise BotException("TAG_NOT_FOUND", name=name)
 
         if tag.is_embed:
-            await ctx.send(embeds=create_embed(description=tag.description, title=tag.title))
+            await ctx.send(embeds=create_embed(description=body.description, title=body.title))
         else:
-            await ctx.send(tag.description)
+            await ctx.send(body.description)
 
-        tag.uses_count += 1
-        await tag.update()
+        self.tag_uses[guild_data.guild_id][tag.name] += 1
+        self.tag_uses_writer.touch(guild_data.guild_id)
 
     @tag.subcommand(name="create")
     @option(
@@ -130,6 +206,7 @@ class Tags(Extension):
             last_edited_at=None,
             uses_count=0,
         )
+        self.get_index(guild_data).add(name)
 
         translate = ctx.translate("TAG_CREATED").format(tag_name=name)
         await ctx.send(embeds=create_embed(translate))
@@ -139,9 +216,12 @@ class Tags(Extension):
     async def tag_delete(self, ctx: CommandContext, name: str):
         """Delete a tag"""
         guild_data = await self.client.database.get_guild(int(ctx.guild_id))
-        await guild_data.remove_tag(name)
+        await guild_data.remove_tag(name=name)
+        self.get_index(guild_data).remove(name)
+        if guild_data.guild_id in self.tag_uses:
+            self.tag_uses[guild_data.guild_id].pop(name, None)
 
-        translate = ctx.translate("TAG_CREATED").format(tag_name=name)
+        translate = ctx.translate("TAG_DELETED").format(tag_name=name)
         await ctx.send(translate)
 
     @tag.subcommand(name="edit")
@@ -150,7 +230,7 @@ class Tags(Extension):
         """Edit a tag"""
         guild_data = await self.client.database.get_guild(int(ctx.guild_id))
         tag = guild_data.get_tag(name)
-        if tag is None:
+        if tag is None or (body := await tag.get_body()) is None:
             raise BotException("TAG_NOT_FOUND", name=name)
 
         await ctx.popup(
@@ -158,8 +238,8 @@ class Tags(Extension):
                 ctx,
                 is_embed=tag.is_embed,
                 name=tag.name,
-                title=tag.title,
-                description=tag.description,
+                title=body.title,
+                description=body.description,
                 custom_id=f"modal_edit_tag|{tag.name}",  # We should store current name of tag because we can change it
             )
         )
@@ -182,13 +262,16 @@ class Tags(Extension):
             description = get_value(1)
 
         guild_data = await self.client.database.get_guild(int(ctx.guild_id))
-        tag = guild_data.get_tag(ctx.data.custom_id.split("|")[1])
+        old_name = ctx.data.custom_id.split("|")[1]
+        tag = guild_data.get_tag(old_name)
+        await tag.set_body(title=title, description=description)
         tag.name = name
-        tag.title = title
-        tag.description = description
         tag.last_edited_at = int(datetime.utcnow().timestamp())
 
         await tag.update()
+        self.get_index(guild_data).rename(old_name, name)
+        if (uses := self.tag_uses.get(guild_data.guild_id)) and old_name in uses:
+            uses[name] += uses.pop(old_name)
 
         translate = ctx.translate("TAG_EDITED").format(tag_name=name)
         await ctx.send(translate)
@@ -197,11 +280,13 @@ class Tags(Extension):
     async def tag_list(self, ctx: CommandContext):
         """Show list of tags"""
         guild_data = await self.client.database.get_guild(int(ctx.guild_id))
-        description = "\n".join(
-            [f"**` {ind} `** `{tag.name}`" for ind, tag in enumerate(guild_data.tags, start=1)]
+        paginator = Paginator(
+            ListPageSource(guild_data.tags or [], TAGS_PER_PAGE),
+            author_id=int(ctx.author.id),
+            formatter=lambda ind, tag: f"**` {ind} `** `{tag.name}`",
+            title=ctx.translate("TAG_LIST"),
         )
-        translate = ctx.translate("TAG_LIST")
-        await ctx.send(embeds=create_embed(description=description, title=translate))
+        await self.client.paginators.send(ctx, paginator)
 
     @tag.subcommand(name="info")
     @option(description="The name of tag to view", autocomplete=True)
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Final
 
 from interactions import (
@@ -9,6 +10,8 @@ from interactions import (
     Color,
     Embed,
     Extension,
+    Guild,
+    Intents,
     Member,
     Overwrite,
     Permissions,
@@ -16,7 +19,16 @@ from interactions import (
     option,
 )
 
-from core import Asteroid, BotException, GuildVoiceLobbies, MissingPermissions, command, listener
+from core import (
+    Asteroid,
+    BotException,
+    Debouncer,
+    GuildVoiceLobbies,
+    MissingPermissions,
+    Priority,
+    command,
+    listener,
+)
 from core.context import CommandContext
 from utils import try_run
 
@@ -28,11 +40,55 @@ VOICE_CHANNEL_OWNER_PERMISSIONS: Final = (
     | Permissions.DEAFEN_MEMBERS
     | Permissions.MANAGE_ROLES  # It's Manage Permissions for channel.
 )
+RECONCILE_INTERVAL: Final = 600
+RECONCILE_CONCURRENCY: Final = 5
+# Lobby changes are saved at most once per this delay for a guild
+LOBBIES_WRITE_DELAY: Final = 5
+MAX_POOL_SIZE: Final = 10
+POOL_CHANNEL_NAME: Final = "Lobby"
+
+
+class LobbyOccupancy:
+    """
+    Tracks members of lobby channels from voice state events.
+    Channel without tracked members is unknown and should be synced with real channel state.
+    """
+
+    __slots__ = "members"
+
+    def __init__(self):
+        self.members: dict[int, set[int]] = {}
+
+    def get_members(self, channel_id: int) -> set[int] | None:
+        return self.members.get(channel_id)
+
+    def set_members(self, channel_id: int, user_ids: set[int]):
+        self.members[channel_id] = user_ids
+
+    def join(self, channel_id: int, user_id: int):
+        if (members := self.members.get(channel_id)) is not None:
+            members.add(user_id)
+
+    def forget(self, channel_id: int):
+        self.members.pop(channel_id, None)
 
 
 class VoiceLobbies(Extension):
+    intents = Intents.GUILDS | Intents.GUILD_VOICE_STATES
+
     def __init__(self, client: Asteroid):
         self.client: Asteroid = client
+        self.occupancy = LobbyOccupancy()
+        self.lobbies_writer: Debouncer[GuildVoiceLobbies] = Debouncer(
+            LOBBIES_WRITE_DELAY, GuildVoiceLobbies.update, name="voice_lobbies"
+        )
+        self._recovered_guilds: set[int] = set()
+        self._replenishing_guilds: set[int] = set()
+        self.client.add_shutdown_callback(self.lobbies_writer.flush)
+
+    @listener
+    async def on_start(self):
+        self.client._loop.create_task(self._reconcile_voice_lobbies_loop())
 
     @listener
     async def on_voice_state_update(self, before: VoiceState, after: VoiceState):
@@ -43,101 +99,306 @@ class VoiceLobbies(Extension):
         if not guild_data.voice_lobbies:
             return
         voice_lobbies = guild_data.voice_lobbies
-        if after.channel_id == voice_lobbies.voice_channel_id:
-            if before and before.channel_id:
-                # Rejoined to main channel from own channel.
-                # I think better remove old channel and create a new one
-                # because user can break own channel somehow
-                await self._remove_transfer_voice_lobby(before, after, voice_lobbies)
-
-            guild = await after.get_guild()
-            member = await self.client.get_member(after.guild_id, after.user_id)
-
-            permissions = [
-                Overwrite(
-                    id=int(member.id),
-                    type=1,
-                    allow=VOICE_CHANNEL_OWNER_PERMISSIONS,
-                )
-            ]
-            if voice_lobbies.private_lobbies:
-                permissions.append(
-                    Overwrite(id=int(guild.id), type=0, deny=Permissions.VIEW_CHANNEL)
-                )
-            channel = await guild.create_channel(
-                member.name[:100],
-                ChannelType.GUILD_VOICE,
-                parent_id=voice_lobbies.category_channel_id,
-                permission_overwrites=permissions,
-            )
-            await member.modify(guild_id=guild.id, channel_id=channel.id)
+        user_id = int(after.user_id)
+
+        if (guild_id := int(after.guild_id)) not in self._recovered_guilds:
+            self._recovered_guilds.add(guild_id)
+            guild = await self.client.get_guild(guild_id)
+            await try_run(self._recover_voice_lobbies, guild, voice_lobbies)
 
-            voice_lobbies.add_channel(int(channel.id), int(member.id))
-            await voice_lobbies.update()
+        if before and before.channel_id:
+            # Rejoined to main channel from own channel.
+            # I think better remove old channel and create a new one
+            # because user can break own channel somehow
+            await self._leave_voice_lobby(int(before.channel_id), user_id, voice_lobbies)
 
+        if not after.channel_id:
+            return
+        if after.channel_id != voice_lobbies.voice_channel_id:
+            self.occupancy.join(int(after.channel_id), user_id)
             return
 
-        await self._remove_transfer_voice_lobby(before, after, voice_lobbies)
-        await self._cleanup_voice_lobbies(voice_lobbies)
+        guild = await after.get_guild()
+        member = await self.client.get_member(after.guild_id, after.user_id)
 
-    async def _remove_transfer_voice_lobby(
-        self, before: VoiceState, after: VoiceState, voice_lobbies: GuildVoiceLobbies
+        permissions = [
+            Overwrite(
+                id=int(member.id),
+                type=1,
+                allow=VOICE_CHANNEL_OWNER_PERMISSIONS,
+            )
+        ]
+        if voice_lobbies.private_lobbies:
+            permissions.append(Overwrite(id=int(guild.id), type=0, deny=Permissions.VIEW_CHANNEL))
+
+        if (channel_id := voice_lobbies.claim_pooled_channel()) is not None:
+            await self._claim_pooled_channel(channel_id, guild, member, permissions, voice_lobbies)
+            return
+
+        channel = await self.client.scheduler.request(
+            guild.create_channel,
+            member.name[:100],
+            ChannelType.GUILD_VOICE,
+            parent_id=voice_lobbies.category_channel_id,
+            permission_overwrites=permissions,
+            bucket=f"guild_channels:{guild.id}",
+        )
+        try:
+            await self.client.scheduler.request(
+                member.modify,
+                guild_id=guild.id,
+                channel_id=channel.id,
+                bucket=f"member:{guild.id}",
+            )
+        except Exception:
+            # Channel without owner isn't tracked, so it would never be removed
+            await try_run(self._delete_channel, channel)
+            raise
+
+        voice_lobbies.add_channel(int(channel.id), int(member.id))
+        self.occupancy.set_members(int(channel.id), {int(member.id)})
+        self.lobbies_writer.touch(voice_lobbies)
+
+    async def _claim_pooled_channel(
+        self,
+        channel_id: int,
+        guild: Guild,
+        member: Member,
+        permissions: list[Overwrite],
+        voice_lobbies: GuildVoiceLobbies,
     ):
         """
-        Removes previous user channel or takes ownership to another channel member, if channel exists.
+        Moves the member to pre-created channel. Channel is renamed and opened in background.
         """
-        if not before or not before.channel_id:
-            return
+        try:
+            await self.client.scheduler.request(
+                member.modify,
+                guild_id=guild.id,
+                channel_id=channel_id,
+                bucket=f"member:{guild.id}",
+            )
+        except Exception:
+            # Channel is still hidden, so it's returned to the pool
+            voice_lobbies.pooled_channels.append(channel_id)
+            self.lobbies_writer.touch(voice_lobbies)
+            raise
+
+        voice_lobbies.add_channel(channel_id, int(member.id))
+        self.occupancy.set_members(channel_id, {int(member.id)})
+        self.lobbies_writer.touch(voice_lobbies)
+
+        channel = await self.client.get_channel(channel_id)
+        self.client._loop.create_task(
+            self._modify_channel(channel, name=member.name[:100], permission_overwrites=permissions)
+        )
+        self.client._loop.create_task(self._replenish_pool(guild, voice_lobbies))
 
-        lobby = voice_lobbies.get_lobby(int(before.channel_id))
+    async def _replenish_pool(self, guild: Guild, voice_lobbies: GuildVoiceLobbies):
+        """Creates hidden channels until the warm pool is full"""
+        guild_id = int(guild.id)
+        if guild_id in self._replenishing_guilds:
+            return
+        self._replenishing_guilds.add(guild_id)
+
+        try:
+            while len(voice_lobbies.pooled_channels) < voice_lobbies.pool_size:
+                channel = await self.client.scheduler.request(
+                    guild.create_channel,
+                    POOL_CHANNEL_NAME,
+                    ChannelType.GUILD_VOICE,
+                    parent_id=voice_lobbies.category_channel_id,
+                    permission_overwrites=[
+                        Overwrite(id=guild_id, type=0, deny=Permissions.VIEW_CHANNEL)
+                    ],
+                    bucket=f"guild_channels:{guild_id}",
+                    priority=Priority.BACKGROUND,
+                )
+                voice_lobbies.pooled_channels.append(int(channel.id))
+                self.lobbies_writer.touch(voice_lobbies)
+
+            while len(voice_lobbies.pooled_channels) > voice_lobbies.pool_size:
+                channel_id = voice_lobbies.pooled_channels.pop()
+                self.lobbies_writer.touch(voice_lobbies)
+                channel = await try_run(self.client.get_channel, channel_id)
+                if not isinstance(channel, Exception):
+                    await try_run(self._delete_channel, channel)
+        finally:
+            self._replenishing_guilds.discard(guild_id)
+
+    async def _leave_voice_lobby(
+        self, channel_id: int, user_id: int, voice_lobbies: GuildVoiceLobbies
+    ):
+        """
+        Removes lobby channel if it became empty or takes ownership to another channel member
+        if the owner left.
+        """
+        lobby = voice_lobbies.get_lobby(channel_id)
         if not lobby:
             return
 
-        channel = await self.client.get_channel(before.channel_id)
-        if not channel.voice_states:
-            await channel.delete()
-            voice_lobbies.remove_lobby(int(before.channel_id))
-            await voice_lobbies.update()
+        members = self.occupancy.get_members(channel_id)
+        channel: Channel | None = None
+        if members is None:
+            channel = await try_run(self.client.get_channel, channel_id)
+            if isinstance(channel, Exception):
+                channel = None
+            members = self._sync_occupancy(channel_id, channel)
+        members.discard(user_id)
+
+        if not members:
+            if channel is None:
+                channel = await try_run(self.client.get_channel, channel_id)
+            if channel and not isinstance(channel, Exception):
+                await try_run(self._delete_channel, channel)
+            self.occupancy.forget(channel_id)
+            voice_lobbies.remove_lobby(channel_id)
+            self.lobbies_writer.touch(voice_lobbies)
+            return
+
+        if lobby.owner_id != user_id:
             return
 
-        first_voice_state: VoiceState = channel.voice_states[0]
-        lobby.owner_id = int(first_voice_state.user_id)
+        new_owner_id = next(iter(members))
+        voice_lobbies.set_owner(lobby, new_owner_id)
+        if channel is None:
+            channel = await self.client.get_channel(channel_id)
         permissions = [
             Overwrite(
-                id=int(after.user_id),
+                id=user_id,
                 type=1,
                 deny=VOICE_CHANNEL_OWNER_PERMISSIONS,
             ),
             Overwrite(
-                id=int(first_voice_state.user_id),
+                id=new_owner_id,
                 type=1,
                 allow=VOICE_CHANNEL_OWNER_PERMISSIONS,
             ),
         ]
         for permission in channel.permission_overwrites:
-            if permission.id == after.guild_id:
+            if int(permission.id) == int(voice_lobbies.guild_id):
                 # Don't remove perms of everyone role
                 permissions.append(permission)
                 break
-        await channel.modify(permission_overwrites=permissions)
-        await voice_lobbies.update()
+        await self._modify_channel(channel, permission_overwrites=permissions)
+        self.lobbies_writer.touch(voice_lobbies)
 
-    async def _cleanup_voice_lobbies(self, voice_lobbies: GuildVoiceLobbies):
+    async def _recover_voice_lobbies(self, guild: Guild, voice_lobbies: GuildVoiceLobbies):
         """
-        Removes channels if they somehow don't were removed.
+        Rebuilds lobbies from real channels of the lobbies category after restart or crash.
         """
-        remove: bool = False
-        for lobby in voice_lobbies.active_channels:
-            channel: Channel = await try_run(self.client.get_channel, lobby.channel_id)
-            if channel:
-                if channel.voice_states:
-                    continue
-                await try_run(channel.delete)
-            voice_lobbies.remove_lobby(lobby.channel_id)
-            remove = True
-
-        if remove:
-            await voice_lobbies.update()
+        lobby_channels: dict[int, Channel] = {
+            int(channel.id): channel
+            for channel in await guild.get_all_channels()
+            if channel.type == ChannelType.GUILD_VOICE
+            and channel.parent_id
+            and int(channel.parent_id) == voice_lobbies.category_channel_id
+            and int(channel.id) != voice_lobbies.voice_channel_id
+        }
+        changed: bool = False
+
+        for lobby in list(voice_lobbies.active_channels):
+            if lobby.channel_id not in lobby_channels:
+                voice_lobbies.remove_lobby(lobby.channel_id)
+                changed = True
+
+        pooled_channels = [
+            channel_id
+            for channel_id in voice_lobbies.pooled_channels
+            if channel_id in lobby_channels
+        ]
+        if len(pooled_channels) != len(voice_lobbies.pooled_channels):
+            voice_lobbies.pooled_channels = pooled_channels
+            changed = True
+
+        for channel_id, channel in lobby_channels.items():
+            lobby = voice_lobbies.get_lobby(channel_id)
+            owner_id = lobby.owner_id if lobby else self._get_channel_owner_id(channel)
+            if owner_id is None:
+                continue  # Not a lobby channel
+
+            if not self._sync_occupancy(channel_id, channel):
+                await try_run(self._delete_channel, channel)
+                self.occupancy.forget(channel_id)
+                if lobby:
+                    voice_lobbies.remove_lobby(channel_id)
+                changed = True
+            elif not lobby:
+                # Channel was created but not saved before crash
+                voice_lobbies.add_channel(channel_id, owner_id)
+                changed = True
+
+        if changed:
+            self.lobbies_writer.touch(voice_lobbies)
+        if len(voice_lobbies.pooled_channels) < voice_lobbies.pool_size:
+            self.client._loop.create_task(self._replenish_pool(guild, voice_lobbies))
+
+    @staticmethod
+    def _get_channel_owner_id(channel: Channel) -> int | None:
+        for overwrite in channel.permission_overwrites or []:
+            if overwrite.type == 1 and int(overwrite.allow or 0) == VOICE_CHANNEL_OWNER_PERMISSIONS:
+                return int(overwrite.id)
+
+    def _sync_occupancy(self, channel_id: int, channel: Channel | None) -> set[int]:
+        members = (
+            {int(voice_state.user_id) for voice_state in channel.voice_states}
+            if channel is not None
+            else set()
+        )
+        self.occupancy.set_members(channel_id, members)
+        return members
+
+    async def _reconcile_voice_lobbies_loop(self):
+        while True:
+            await asyncio.sleep(RECONCILE_INTERVAL)
+            for _, guild_data in list(self.client.database.guilds_storage.items()):
+                if guild_data.voice_lobbies:
+                    await try_run(self._reconcile_voice_lobbies, guild_data.voice_lobbies)
+
+    async def _reconcile_voice_lobbies(self, voice_lobbies: GuildVoiceLobbies):
+        """
+        Syncs tracked lobby members with real channels and removes lobbies
+        which somehow don't were removed.
+        """
+        semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+        removed: list[int] = []
+
+        async def reconcile_lobby(channel_id: int):
+            async with semaphore:
+                channel = await try_run(self.client.get_channel, channel_id)
+                if isinstance(channel, Exception):
+                    channel = None
+                if self._sync_occupancy(channel_id, channel):
+                    return
+                if channel is not None:
+                    await try_run(self._delete_channel, channel)
+                removed.append(channel_id)
+
+        await asyncio.gather(
+            *[reconcile_lobby(lobby.channel_id) for lobby in voice_lobbies.active_channels]
+        )
+
+        if removed:
+            for channel_id in removed:
+                self.occupancy.forget(channel_id)
+                voice_lobbies.remove_lobby(channel_id)
+            self.lobbies_writer.touch(voice_lobbies)
+
+    async def _modify_channel(
+        self, channel: Channel, priority: Priority = Priority.USER_VISIBLE, **kwargs
+    ):
+        """Modifies the channel. Repeated pending modifications are merged into one request"""
+        await self.client.scheduler.request(
+            channel.modify,
+            bucket=f"channel:{channel.id}",
+            priority=priority,
+            key=("channel_modify", int(channel.id)),
+            **kwargs,
+        )
+
+    async def _delete_channel(self, channel: Channel):
+        await self.client.scheduler.request(
+            channel.delete, bucket=f"channel:{channel.id}", priority=Priority.BACKGROUND
+        )
 
     @command()
     async def voice(self, ctx: CommandContext):
@@ -148,12 +409,14 @@ class VoiceLobbies(Extension):
     @option("Name for voice channel. Can be edited later.")
     @option("Should be lobbies are private by default? Can be edited later.")
     @option("Creates the special channel to control lobbies")
+    @option("Amount of pre-created lobbies for instant join", min_value=0, max_value=MAX_POOL_SIZE)
     async def setup(
         self,
         ctx: CommandContext,
         channel_name: str = None,
         private_lobbies: bool = False,
         create_menu_channel: bool = True,
+        pool_size: int = 0,
     ):
         """Setup voice lobbies on your server"""
         if Permissions.MANAGE_GUILD not in ctx.author.permissions:
@@ -163,29 +426,66 @@ class VoiceLobbies(Extension):
         voice_lobbies_text = ctx.translate("VOICE_LOBBIES_CHANNEL")
         create_lobby_text = ctx.translate("VOICE_LOBBIES_CREATE")
 
-        category_channel = await guild.create_channel(
-            voice_lobbies_text, ChannelType.GUILD_CATEGORY
+        bucket = f"guild_channels:{guild.id}"
+        category_channel = await self.client.scheduler.request(
+            guild.create_channel,
+            voice_lobbies_text,
+            ChannelType.GUILD_CATEGORY,
+            bucket=bucket,
+            priority=Priority.INTERACTION,
         )
-        voice_channel = await guild.create_channel(
-            channel_name or create_lobby_text, ChannelType.GUILD_VOICE, parent_id=category_channel
+        voice_channel = await self.client.scheduler.request(
+            guild.create_channel,
+            channel_name or create_lobby_text,
+            ChannelType.GUILD_VOICE,
+            parent_id=category_channel,
+            bucket=bucket,
+            priority=Priority.INTERACTION,
         )
         text_channel = None
         if create_menu_channel:
             control_text = ctx.translate("VOICE_LOBBIES_CONTROL_CENTER")
-            text_channel = await guild.create_channel(
-                control_text, ChannelType.GUILD_TEXT, parent_id=category_channel
+            text_channel = await self.client.scheduler.request(
+                guild.create_channel,
+                control_text,
+                ChannelType.GUILD_TEXT,
+                parent_id=category_channel,
+                bucket=bucket,
+                priority=Priority.INTERACTION,
             )
             await self._send_control_menu(ctx, text_channel)
 
-        await self.client.database.setup_voice_lobbies(
+        voice_lobbies = await self.client.database.setup_voice_lobbies(
             ctx.guild_id,
             category_channel.id,
             voice_channel.id,
             text_channel.id if text_channel else None,
             private_lobbies,
+            pool_size,
         )
+        if pool_size:
+            self.client._loop.create_task(self._replenish_pool(guild, voice_lobbies))
         await ctx.send(ctx.translate("VOICE_LOBBIES_READY"))
 
+    @voice.subcommand()
+    @option("Amount of pre-created lobbies. 0 to disable", min_value=0, max_value=MAX_POOL_SIZE)
+    async def pool(self, ctx: CommandContext, size: int):
+        """Configures amount of pre-created lobbies for instant join"""
+        if Permissions.MANAGE_GUILD not in ctx.author.permissions:
+            raise MissingPermissions(Permissions.MANAGE_GUILD)
+
+        guild_data = await self.client.database.get_guild(ctx.guild_id)
+        voice_lobbies = guild_data.voice_lobbies
+        if not voice_lobbies:
+            raise BotException("VOICE_NOT_SETUP")
+
+        voice_lobbies.pool_size = size
+        self.lobbies_writer.touch(voice_lobbies)
+
+        guild = await self.client.get_guild(ctx.guild_id)
+        self.client._loop.create_task(self._replenish_pool(guild, voice_lobbies))
+        await ctx.send(ctx.translate("VOICE_LOBBIES_POOL_UPDATED", size=size))
+
     @voice.group()
     async def lobby(self, ctx: CommandContext):
         """Lobby subcommand group option"""
@@ -207,7 +507,9 @@ class VoiceLobbies(Extension):
             add_new_overwrite=True,
         )
 
-        await channel.modify(permission_overwrites=channel.permission_overwrites)
+        await self._modify_channel(
+            channel, Priority.INTERACTION, permission_overwrites=channel.permission_overwrites
+        )
 
         translate = ctx.translate("VOICE_MEMBER_BLOCKED", member.mention)
         await ctx.send(translate)
@@ -229,7 +531,9 @@ class VoiceLobbies(Extension):
             add_new_overwrite=True,
         )
 
-        await channel.modify(permission_overwrites=channel.permission_overwrites)
+        await self._modify_channel(
+            channel, Priority.INTERACTION, permission_overwrites=channel.permission_overwrites
+        )
 
         translate = ctx.translate("VOICE_MEMBER_UNBLOCKED", member.mention)
         await ctx.send(translate)
@@ -246,7 +550,9 @@ class VoiceLobbies(Extension):
             channel.permission_overwrites, id=int(ctx.guild_id), type=0, deny=deny, allow=allow
         )
 
-        await channel.modify(permission_overwrites=channel.permission_overwrites)
+        await self._modify_channel(
+            channel, Priority.INTERACTION, permission_overwrites=channel.permission_overwrites
+        )
 
         translate = ctx.translate("VOICE_LOBBY_HIDE_OFF" if hide else "VOICE_LOBBY_HIDE_OFF")
         await ctx.send(translate)
@@ -257,7 +563,7 @@ class VoiceLobbies(Extension):
         """Changes name of your lobby"""
         channel = await self.__get_lobby_channel(ctx)
 
-        await channel.modify(name=name)
+        await self._modify_channel(channel, Priority.INTERACTION, name=name)
 
     @lobby.subcommand()
     @option("The new owner of lobby")
@@ -280,13 +586,15 @@ class VoiceLobbies(Extension):
             allow=VOICE_CHANNEL_OWNER_PERMISSIONS,
         )
 
-        await channel.modify(permission_overwrites=channel.permission_overwrites)
+        await self._modify_channel(
+            channel, Priority.INTERACTION, permission_overwrites=channel.permission_overwrites
+        )
 
         guild_data = await self.client.database.get_guild(ctx.guild_id)
         lobby = guild_data.voice_lobbies.get_lobby(int(channel.id))
-        lobby.owner_id = int(member.id)
+        guild_data.voice_lobbies.set_owner(lobby, int(member.id))
 
-        await guild_data.voice_lobbies.update()
+        self.lobbies_writer.touch(guild_data.voice_lobbies)
 
         translate = ctx.translate("VOICE_LOBBY_OWNERSHIP_TRANSFERRED", member.mention)
         await ctx.send(translate)
@@ -331,7 +639,13 @@ class VoiceLobbies(Extension):
             description="",  # TODO: add text like (emoji: what button with this emoji does)
             color=Color.BLURPLE,
         )
-        await channel.send(embeds=embed, components=components)
+        await self.client.scheduler.request(
+            channel.send,
+            embeds=embed,
+            components=components,
+            bucket=f"message:{channel.id}",
+            priority=Priority.INTERACTION,
+        )
 
     async def __get_lobby_channel(self, ctx: CommandContext) -> Channel:
         guild_data = await self.client.database.get_guild(ctx.guild_id)
@@ -11,7 +11,7 @@ load_dotenv()
 
 client = Asteroid(
     getenv("MONGO_URL"),
-    intents=Intents.ALL,
+    intents=Intents.GUILDS,
 )
 i18n = setup(client)
 
@@ -23,4 +23,8 @@ async def on_ready():
     print("Bot ready")
 
 
-client.start(getenv("TOKEN"))
+try:
+    client.start(getenv("TOKEN"))
+finally:
+    # Flush pending database writes
+    client._loop.run_until_complete(client.run_shutdown_callbacks())
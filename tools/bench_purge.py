@@ -0,0 +1,101 @@
+"""
+Benchmark of purging messages of a channel.
+
+`ChannelPurge` deletes messages of a fake channel through the request scheduler.
+Some deletion requests of the fake API fail to check that failures are counted.
+Limits are scaled down to finish in seconds. Run from the repository root:
+
+    python tools/bench_purge.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "source"))
+
+from extensions.moderation import DISCORD_EPOCH, ChannelPurge  # noqa: E402
+
+from core import scheduler  # noqa: E402
+from core.scheduler import RequestScheduler  # noqa: E402
+
+# (requests, per seconds)
+scheduler.BUCKET_LIMITS = {}
+scheduler.DEFAULT_BUCKET_LIMIT = (50, 0.1)
+scheduler.GLOBAL_LIMIT = (200, 0.1)
+
+MESSAGES = 1000
+DAY = 24 * 60 * 60
+
+
+def get_snowflake(timestamp: float, increment: int) -> int:
+    return (int(timestamp * 1000) - DISCORD_EPOCH) << 22 | increment
+
+
+class FakeAPI:
+    """Channel with messages from now up to a month ago. Every `fail_every` deletion fails"""
+
+    def __init__(self, fail_every: int = 0):
+        now = time()
+        self.messages: list[dict] = [
+            {"id": str(get_snowflake(now - index * 30 * DAY / MESSAGES, index % 4096))}
+            for index in range(MESSAGES)
+        ]
+        self.fail_every: int = fail_every
+        self.requests: dict[str, int] = {"history": 0, "bulk": 0, "single": 0}
+
+    def _should_fail(self) -> bool:
+        return self.fail_every and sum(self.requests.values()) % self.fail_every == 0
+
+    async def get_channel_messages(self, channel_id: int, *, limit: int, before: int = None):
+        self.requests["history"] += 1
+        messages = [m for m in self.messages if before is None or int(m["id"]) < before]
+        return messages[:limit]
+
+    async def delete_messages(self, channel_id: int, message_ids: list[int]):
+        self.requests["bulk"] += 1
+        assert 2 <= len(message_ids) <= 100
+        if self._should_fail():
+            raise RuntimeError("Bulk delete failed")
+        message_ids = {str(message_id) for message_id in message_ids}
+        self.messages = [m for m in self.messages if m["id"] not in message_ids]
+
+    async def delete_message(self, channel_id: int, message_id: int):
+        self.requests["single"] += 1
+        if self._should_fail():
+            raise RuntimeError("Delete failed")
+        self.messages = [m for m in self.messages if m["id"] != str(message_id)]
+
+
+class FakeClient:
+    def __init__(self, api: FakeAPI):
+        self._http = api
+        self.scheduler = RequestScheduler()
+
+
+async def run(bulk: bool, fail_every: int):
+    api = FakeAPI(fail_every)
+    purge = ChannelPurge(FakeClient(api), 1, MESSAGES, bulk=bulk)
+    started_at = perf_counter()
+    await purge.run()
+    elapsed = perf_counter() - started_at
+
+    assert purge.deleted + purge.failed == MESSAGES, (purge.deleted, purge.failed)
+    assert len(api.messages) == purge.failed
+    if not fail_every:
+        assert purge.failed == 0
+    print(
+        f"bulk={bulk}, fail every {fail_every or '-'}: deleted {purge.deleted}, "
+        f"failed {purge.failed} in {elapsed:.2f}s, requests {api.requests}"
+    )
+
+
+async def main():
+    for bulk in (True, False):
+        for fail_every in (0, 7):
+            await run(bulk, fail_every)
+    print("deleted and failed messages match the channel")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
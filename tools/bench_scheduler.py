@@ -0,0 +1,139 @@
+"""
+Benchmark of the REST request scheduler.
+
+Requests are served by a fake coroutine, so only the scheduling is measured.
+Limits are scaled down to finish in seconds. Run from the repository root:
+
+    python tools/bench_scheduler.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+from time import monotonic, perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "source"))
+
+from core import scheduler  # noqa: E402
+from core.metrics import metrics  # noqa: E402
+from core.scheduler import Priority, RequestScheduler  # noqa: E402
+
+# (requests, per seconds)
+scheduler.BUCKET_LIMITS = {}
+scheduler.DEFAULT_BUCKET_LIMIT = (20, 0.2)
+scheduler.GLOBAL_LIMIT = (100, 0.2)
+
+
+class FakeAPI:
+    def __init__(self):
+        self.sent: list[tuple[str, float]] = []
+
+    async def request(self, name: str, **kwargs):
+        self.sent.append((name, monotonic()))
+        return name
+
+
+async def bench_throughput(requests: int = 2000, buckets: int = 20):
+    api = FakeAPI()
+    requests_scheduler = RequestScheduler()
+    start = perf_counter()
+    await asyncio.gather(
+        *(
+            requests_scheduler.request(api.request, str(i), bucket=f"bench:{i % buckets}")
+            for i in range(requests)
+        )
+    )
+    elapsed = perf_counter() - start
+    print(f"throughput: {requests} requests in {elapsed:.2f}s ({requests / elapsed:.0f} req/s)")
+
+
+async def bench_priorities():
+    """Interactions added after a backlog of background requests are served first"""
+    api = FakeAPI()
+    requests_scheduler = RequestScheduler()
+    background = [
+        asyncio.create_task(
+            requests_scheduler.request(
+                api.request, f"background-{i}", bucket="member:1", priority=Priority.BACKGROUND
+            )
+        )
+        for i in range(100)
+    ]
+    await asyncio.sleep(0.05)
+    interactions = [
+        asyncio.create_task(
+            requests_scheduler.request(
+                api.request, f"interaction-{i}", bucket="member:1", priority=Priority.INTERACTION
+            )
+        )
+        for i in range(10)
+    ]
+    await asyncio.gather(*background, *interactions)
+
+    order = [name for name, _ in api.sent]
+    last_interaction = max(order.index(f"interaction-{i}") for i in range(10))
+    print(f"priorities: last interaction sent as #{last_interaction + 1} of {len(order)}")
+    assert last_interaction < 60, "interactions waited for the background backlog"
+
+
+async def bench_global_reserve():
+    """Bucket isn't blocked by a background request which waits for the global reserve"""
+    api = FakeAPI()
+    requests_scheduler = RequestScheduler()
+    # Global limit is exhausted up to the reserve of background requests and refills slowly
+    requests_scheduler._global = scheduler.TokenBucket(100, 10.0)
+    requests_scheduler._global.tokens = scheduler.BACKGROUND_RESERVE
+    waiting = asyncio.create_task(
+        requests_scheduler.request(
+            api.request, "background", bucket="member:1", priority=Priority.BACKGROUND
+        )
+    )
+    await asyncio.sleep(0.01)
+    await requests_scheduler.request(
+        api.request, "interaction", bucket="member:1", priority=Priority.INTERACTION
+    )
+    await waiting
+
+    order = [name for name, _ in api.sent]
+    print(f"global reserve: sent in order {order}")
+    assert order == ["interaction", "background"]
+
+
+async def bench_coalescing():
+    """Coalesced request takes the highest priority of merged requests"""
+    api = FakeAPI()
+    requests_scheduler = RequestScheduler()
+    backlog = [
+        asyncio.create_task(
+            requests_scheduler.request(
+                api.request, f"background-{i}", bucket="member:1", priority=Priority.BACKGROUND
+            )
+        )
+        for i in range(60)
+    ]
+    await asyncio.sleep(0)
+    coalesced = [
+        asyncio.create_task(
+            requests_scheduler.request(
+                api.request, "modify", bucket="member:1", priority=priority, key="member:1:1"
+            )
+        )
+        for priority in (Priority.BACKGROUND, Priority.INTERACTION)
+    ]
+    await asyncio.gather(*backlog, *coalesced)
+
+    order = [name for name, _ in api.sent]
+    print(f"coalescing: {order.count('modify')} request sent as #{order.index('modify') + 1}")
+    assert order.count("modify") == 1 and order.index("modify") < 30
+
+
+async def main():
+    await bench_throughput()
+    await bench_priorities()
+    await bench_global_reserve()
+    await bench_coalescing()
+    for name, timing in sorted(metrics.timings.items()):
+        print(f"{name}: {timing!r}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Benchmark of the spam detector.
+
+Measures `SpamDetector.check` for regular messages of many members, which is the common case
+of `on_message_create`, and checks that flood and repeated messages are detected.
+Run from the repository root:
+
+    python tools/bench_spam_detector.py
+"""
+import random
+import sys
+from pathlib import Path
+from timeit import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "source"))
+
+from extensions.moderation import SPAM_MESSAGES_LIMIT, SpamDetector  # noqa: E402
+
+MEMBERS = 10000
+MESSAGES = 200000
+# Microseconds per message
+TARGET = 10
+
+
+def check():
+    detector = SpamDetector()
+    assert not any(detector.check(1, 1, f"message {index}", index * 0.1) for index in range(6))
+    assert detector.check(1, 1, "message 6", 0.6)
+
+    detector = SpamDetector()
+    results = [detector.check(1, 2, "buy now", index * 0.1) for index in range(3)]
+    assert results == [False, False, True]
+
+    detector = SpamDetector()
+    # Messages outside the window aren't counted
+    assert not any(
+        detector.check(1, 3, "same", index * 10.0) for index in range(SPAM_MESSAGES_LIMIT * 2)
+    )
+    detector.prune(1000.0)
+    assert not detector.histories
+
+
+def main():
+    check()
+
+    rng = random.Random(0)
+    detector = SpamDetector()
+    members = [(rng.randrange(10), user_id) for user_id in range(MEMBERS)]
+    contents = [f"hello there, how are you doing today? {index}" for index in range(1000)]
+    # Members send a message every few seconds, so they don't spam
+    messages = [
+        (*rng.choice(members), rng.choice(contents), index * 0.001) for index in range(MESSAGES)
+    ]
+
+    elapsed = timeit(lambda: [detector.check(*message) for message in messages], number=1)
+    overhead = timeit(lambda: [message for message in messages], number=1)
+    per_message = (elapsed - overhead) / MESSAGES * 1e6
+    print(f"check: {per_message:.2f}us per message, {len(detector.histories)} windows")
+    assert per_message < TARGET, f"check takes {per_message:.2f}us, target is {TARGET}us"
+
+
+if __name__ == "__main__":
+    main()
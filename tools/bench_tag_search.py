@@ -0,0 +1,123 @@
+"""
+Checks and benchmarks search of tag names.
+
+Results of `TagIndex.search` are compared with a scan which normalizes names on every query
+like autocomplete did before the index, then both are timed. Search of 10k tags must fit
+the interaction deadline with a wide margin. Run from the repository root:
+
+    python tools/bench_tag_search.py
+"""
+import random
+import string
+import sys
+from pathlib import Path
+from timeit import timeit
+
+from rapidfuzz import fuzz, process
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "source"))
+
+from extensions.tags import AUTOCOMPLETE_SCORE_CUTOFF, TagIndex  # noqa: E402
+
+# Seconds of a search. Autocomplete must respond within 3 seconds
+MAX_SEARCH_TIME = 0.1
+
+WORDS = [
+    "faq", "rules", "apply", "moderator", "role", "roles", "server", "invite", "bot", "music",
+    "help", "event", "giveaway", "ban", "appeal", "verify", "ticket", "support", "guide", "news",
+]  # fmt: skip
+
+
+def get_names(count: int, rng: random.Random) -> list[str]:
+    names = set()
+    while len(names) < count:
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            name += f" {rng.randint(1, 999)}"
+        names.add(name)
+    return list(names)
+
+
+def get_queries(names: list[str], count: int, rng: random.Random) -> list[str]:
+    def typo(text: str) -> str:
+        chars = list(text)
+        for _ in range(rng.randint(1, 3)):
+            position = rng.randrange(len(chars) + 1)
+            match rng.randrange(3):
+                case 0:
+                    chars.insert(position, rng.choice(string.ascii_lowercase))
+                case 1 if len(chars) > 1:
+                    del chars[min(position, len(chars) - 1)]
+                case _:
+                    chars[min(position, len(chars) - 1)] = rng.choice(string.ascii_lowercase)
+        return "".join(chars)
+
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names)
+        match rng.randrange(5):
+            case 0:
+                queries.append(name[: rng.randint(1, len(name))])
+            case 1:
+                queries.append(typo(name))
+            case 2:
+                # Query longer than the name
+                queries.append(f"{name} {rng.choice(WORDS)} please")
+            case 3:
+                queries.append(
+                    "".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(1, 12)))
+                )
+            case _:
+                queries.append(rng.choice(WORDS))
+    return queries
+
+
+def scan(names: list[str], query: str, limit: int) -> list[str]:
+    options = process.extract(
+        TagIndex.normalize(query),
+        names,
+        scorer=fuzz.partial_ratio,
+        processor=TagIndex.normalize,
+        limit=limit,
+        score_cutoff=AUTOCOMPLETE_SCORE_CUTOFF,
+    )
+    return [name for name, _, _ in options]
+
+
+def check(index: TagIndex, queries: list[str]):
+    """Index must find every name which is found by the scan"""
+    for query in queries:
+        if not TagIndex.normalize(query):
+            continue  # Empty query lists first names without scoring
+        found = set(index.search(query, limit=len(index)))
+        expected = set(scan(list(index.names), query, limit=len(index)))
+        assert found == expected, (query, expected - found, found - expected)
+
+    # Cases which were lost by the removed bigram prefilter
+    index = TagIndex(["faq", "rules", "moderator"])
+    assert "faq" in index.search("faq please")
+    assert "moderator" in index.search("mmodderatorr")
+
+
+def main():
+    rng = random.Random(0)
+    for count in (100, 1000, 5000, 10_000):
+        names = get_names(count, rng)
+        index = TagIndex(names)
+        queries = get_queries(list(index.names), 300, rng)
+        check(index, queries)
+
+        number = 5
+        indexed = timeit(lambda: [index.search(query) for query in queries], number=number)
+        scanned = timeit(lambda: [scan(names, query, 25) for query in queries], number=number)
+        per_query = number * len(queries)
+        print(
+            f"{count} tags: index {indexed / per_query * 1e6:.1f}us, "
+            f"scan {scanned / per_query * 1e6:.1f}us per query"
+        )
+        assert indexed / per_query < MAX_SEARCH_TIME, f"search of {count} tags is too slow"
+    print("index results match the scan")
+
+
+if __name__ == "__main__":
+    main()
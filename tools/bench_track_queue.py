@@ -0,0 +1,102 @@
+"""
+Benchmark of the player queue.
+
+Operations of `TrackQueue` are compared with the same operations on a list,
+which the player used before. Run from the repository root:
+
+    python tools/bench_track_queue.py
+"""
+import random
+import sys
+from pathlib import Path
+from timeit import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "source"))
+
+from extensions.music import TrackQueue  # noqa: E402
+
+WORDS = ["never", "gonna", "give", "you", "up", "let", "down", "run", "around", "desert"]
+
+
+class FakeTrack:
+    __slots__ = ("title", "extra")
+
+    def __init__(self, title: str):
+        self.title: str = title
+        self.extra: dict = {}
+
+
+def get_tracks(count: int, rng: random.Random) -> list[FakeTrack]:
+    return [
+        FakeTrack(f"{' '.join(rng.sample(WORDS, rng.randint(2, 5)))} {index}")
+        for index in range(count)
+    ]
+
+
+def check(tracks: list[FakeTrack]):
+    queue = TrackQueue(tracks)
+    expected = list(tracks)
+
+    assert queue.pop(0) is expected.pop(0)
+    assert queue.pop() is expected.pop()
+    assert queue.pop(5) is expected.pop(5)
+    assert queue[2:7] == expected[2:7]
+
+    assert queue.remove_range(3, 10) == 10
+    del expected[3:13]
+    assert queue.remove_range(len(queue) - 2, 10) == 2
+    del expected[-2:]
+    assert list(queue) == expected
+
+    queue.move(0, 4)
+    expected.insert(4, expected.pop(0))
+    assert list(queue) == expected
+
+    title = expected[7].title
+    assert queue.find(title) == expected.index(expected[7])
+    assert queue.find("missing") is None
+    assert 7 in queue.search(title)
+
+    queue.shuffle()
+    assert sorted(map(id, queue)) == sorted(map(id, expected))
+
+
+def main():
+    rng = random.Random(0)
+    for count in (100, 1000, 10000):
+        tracks = get_tracks(count, rng)
+        check(tracks)
+
+        def drain_queue():
+            queue = TrackQueue(tracks)
+            while queue:
+                queue.pop(0)
+
+        def drain_list():
+            queue = list(tracks)
+            while queue:
+                queue.pop(0)
+
+        queue = TrackQueue(tracks)
+        title = tracks[-1].title
+        query = " ".join(title.split()[:2])
+        timings = {
+            "drain": (timeit(drain_queue, number=5), timeit(drain_list, number=5)),
+            "find last": (timeit(lambda: queue.find(title), number=5), None),
+            "search": (timeit(lambda: queue.search(query), number=5), None),
+            "remove half": (
+                timeit(lambda: TrackQueue(tracks).remove_range(count // 4, count // 2), number=5),
+                None,
+            ),
+            "shuffle": (timeit(lambda: TrackQueue(tracks).shuffle(), number=5), None),
+        }
+        for name, (queue_time, list_time) in timings.items():
+            line = f"{count} tracks, {name}: queue {queue_time / 5 * 1e3:.2f}ms"
+            if list_time is not None:
+                line += f", list {list_time / 5 * 1e3:.2f}ms"
+            print(line)
+    print("queue operations match the list")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Checks database documents written for voice time.
+
+Voice time of a cached user is flushed through `Leveling.flush_voice_time`, then the user is
+changed and saved with `GuildUser.update`. Increments must be written only once and fields
+must be written by their database names. Run from the repository root:
+
+    python tools/check_voice_time_update.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+from time import monotonic
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "source"))
+
+from extensions.leveling import Leveling  # noqa: E402
+
+from core.database.models import GuildUser  # noqa: E402
+
+GUILD_ID = 1
+USER_ID = 10
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.user = GuildUser(
+            _id=str(USER_ID),
+            voice_time_count=100,
+            leveling={"level": 1, "xp": 30, "xp_amount": 130},
+            _database=self,
+            guild_id=GUILD_ID,
+        )
+        self.guild = SimpleNamespace(
+            guild_id=GUILD_ID,
+            voice_time={},
+            leveling=SimpleNamespace(voice_factor=10),
+            get_user=lambda user_id: self.user if user_id == USER_ID else None,
+        )
+        self.increments: list[dict] = []
+        self.user_updates: list[dict] = []
+
+    async def get_guild(self, guild_id: int):
+        return self.guild
+
+    async def increment_users(self, guild_id: int, increments: dict):
+        self.increments.append(increments)
+
+    async def update_guild(self, *args):
+        pass
+
+    async def update_user(self, guild_id: int, user_id: int, data: dict):
+        self.user_updates.append(data)
+
+
+async def main():
+    database = FakeDatabase()
+    leveling = object.__new__(Leveling)
+    Leveling.__init__(
+        leveling,
+        SimpleNamespace(database=database, add_shutdown_callback=lambda callback: None),
+    )
+
+    # 90 seconds with voice factor 10 give 15 experience
+    leveling.voice_time.join(GUILD_ID, USER_ID, monotonic() - 90.5)
+    await leveling.flush_voice_time()
+
+    assert database.increments == [
+        {USER_ID: {"voice_time_count": 90, "leveling.xp": 15, "leveling.xp_amount": 15}}
+    ], database.increments
+    user = database.user
+    assert (user.voice_time, user.leveling.xp, user.leveling.xp_amount) == (190, 45, 145)
+
+    # Saved increments aren't set again by the next update
+    user.leveling.level = 2
+    await user.update()
+    assert database.user_updates == [
+        {"leveling": {"level": 2, "xp": 45, "xp_amount": 145, "role": None}}
+    ], database.user_updates
+
+    # Changed fields are written by their database names
+    user.voice_time = 0
+    await user.update()
+    assert database.user_updates[-1] == {"voice_time_count": 0}, database.user_updates[-1]
+    print("voice time update documents are correct")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())